@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Sebastian Klaassen. All Rights Reserved.
+# Distributed under the MIT License. See LICENSE file for more info.
+
+import os
+import sys
+import time
+from asyncframes import sleep
+from qt5frames import *
+from PyQt5.QtWidgets import QApplication
+from asyncframes.pyqt5_eventloop import EventLoop
+
+ROWS, COLS = 50, 40
+REPEATS = 5
+
+@MainWindow(size=(800, 600), title="Layout Construction Benchmark")
+async def benchmark_layout(self):
+    await sleep(0.1) # Wait for the window to show up
+    construct_times, layout_times = [], []
+    grid = None
+    for _ in range(REPEATS):
+        if grid is not None:
+            grid.hide()
+        t0 = time.perf_counter()
+        with GridLayout() as grid:
+            for i in range(ROWS * COLS):
+                Label("cell {}".format(i), row=i // COLS, col=i % COLS)
+        t1 = time.perf_counter()
+        QApplication.processEvents() # First layout and paint
+        t2 = time.perf_counter()
+        construct_times.append(t1 - t0)
+        layout_times.append(t2 - t1)
+        await sleep(0.1)
+
+    print("{} labels in a {}x{} grid".format(ROWS * COLS, ROWS, COLS))
+    print("construction: {:.1f} ms (best of {})".format(1000.0 * min(construct_times), REPEATS))
+    print("first layout and paint: {:.1f} ms (best of {})".format(1000.0 * min(layout_times), REPEATS))
+    sys.stdout.flush()
+    os._exit(0) # Exit without tearing down the grids, which isn't part of this benchmark
+
+loop = EventLoop()
+loop.run(benchmark_layout)
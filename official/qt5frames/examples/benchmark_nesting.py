@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Sebastian Klaassen. All Rights Reserved.
+# Distributed under the MIT License. See LICENSE file for more info.
+
+import os
+import sys
+import time
+from asyncframes import Frame, sleep
+from qt5frames import *
+from qt5frames.linalg import *
+from asyncframes.pyqt5_eventloop import EventLoop
+
+DEPTH = 100
+NUM_WIDGETS = 500
+NUM_SHAPES = 20000
+
+def nested(frameclass, depth, body):
+    if depth == 0:
+        body()
+    else:
+        with frameclass():
+            nested(frameclass, depth - 1, body)
+
+def create_widgets():
+    for i in range(NUM_WIDGETS):
+        Label("label {}".format(i))
+
+def create_shapes():
+    for i in range(NUM_SHAPES):
+        Rect(vec2(i % 100, i // 100), vec2(1, 1))
+
+@MainWindow(size=(400, 300), title="Nesting Benchmark")
+async def benchmark_nesting(self):
+    await sleep(0.1) # Wait for the window to show up
+    with VBoxLayout():
+        t0 = time.perf_counter()
+        nested(Frame, DEPTH, create_widgets) # Widgets look up their container through DEPTH frames
+        t1 = time.perf_counter()
+        with Canvas():
+            nested(CanvasLayer, DEPTH, create_shapes) # Shapes look up their canvas through DEPTH layers
+        t2 = time.perf_counter()
+
+    print("{} labels {} frames deep: {:.1f} ms".format(NUM_WIDGETS, DEPTH, 1000.0 * (t1 - t0)))
+    print("{} shapes {} layers deep: {:.1f} ms".format(NUM_SHAPES, DEPTH, 1000.0 * (t2 - t1)))
+    sys.stdout.flush()
+    os._exit(0) # Exit without tearing down the frame hierarchy, which isn't part of this benchmark
+
+loop = EventLoop()
+loop.run(benchmark_nesting)
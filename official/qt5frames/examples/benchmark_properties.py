@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Sebastian Klaassen. All Rights Reserved.
+# Distributed under the MIT License. See LICENSE file for more info.
+
+import os
+import sys
+import time
+from asyncframes import sleep
+from qt5frames import *
+from PyQt5.QtWidgets import QApplication
+from asyncframes.pyqt5_eventloop import EventLoop
+
+NUM_RECORDS = 20000
+
+def process(progressbar, lcd):
+    t0 = time.perf_counter()
+    for i in range(NUM_RECORDS): # Report progress for every processed record
+        progressbar.value = i
+        lcd.value = i
+    QApplication.processEvents() # Apply buffered writes and repaint
+    return time.perf_counter() - t0
+
+@MainWindow(size=(400, 100), title="Property Coalescing Benchmark")
+async def benchmark_properties(self):
+    with VBoxLayout():
+        progressbar = ProgressBar()
+        progressbar.maximum = NUM_RECORDS
+        lcd = LCDNumber(6)
+    await sleep(0.1) # Wait for the window to show up
+
+    direct = process(progressbar, lcd)
+    progressbar.coalesce_properties = lcd.coalesce_properties = True
+    coalesced = process(progressbar, lcd)
+
+    print("{} progress updates".format(NUM_RECORDS))
+    print("direct: {:.1f} ms".format(1000.0 * direct))
+    print("coalesced: {:.1f} ms".format(1000.0 * coalesced))
+    sys.stdout.flush()
+    os._exit(0) # Exit without tearing down the window, which isn't part of this benchmark
+
+loop = EventLoop()
+loop.run(benchmark_properties)
@@ -2,6 +2,7 @@
 # Copyright (c) Sebastian Klaassen. All Rights Reserved.
 # Distributed under the MIT License. See LICENSE file for more info.
 
+import threading
 from asyncframes import Frame, Event, hold, sleep
 from qt5frames import MainWindow, dialogs, DialogButtonBox
 from asyncframes.pyqt5_eventloop import EventLoop
@@ -11,5 +12,15 @@ async def main_frame():
     if await dialogs.InputBox("Will it rain tomorrow?") == 1:
         await dialogs.MessageBox("Better pack an umbrella!")
 
+@MainWindow
+async def progress_frame():
+    progress = dialogs.ProgressHandle(maximum=10000000)
+    def work():
+        for i in range(progress.maximum):
+            if progress.cancelled: break
+            progress.step() # Lock-free, the dialog samples the progress 20 times per second
+    threading.Thread(target=work).start()
+    await dialogs.ProgressBox("Counting to ten million...", progress=progress)
+
 loop = EventLoop()
 loop.run(main_frame)
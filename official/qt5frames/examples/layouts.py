@@ -96,5 +96,17 @@ async def layout_compound():
         sl.setCurrentIndex(1)
         await sleep(1)
 
+@MainWindow(size=(400, 200), title="Lazy Tabs Example")
+async def layout_lazy_tabs():
+    with TabWidget:
+        for i in range(40):
+            # The body of each page runs when the page is first opened. Pages that aren't opened for 10 seconds are unloaded
+            @TabPage(str(i), layout=Layout.vbox, lazy=True, unload_after=10, placeholder="Loading...")
+            def page(i):
+                for j in range(10):
+                    PushButton('{}.{}'.format(i, j))
+            page(i)
+    await hold()
+
 loop = EventLoop()
 loop.run(layout_compound)
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Sebastian Klaassen. All Rights Reserved.
+# Distributed under the MIT License. See LICENSE file for more info.
+
+import random
+from asyncframes import Frame, sleep
+from qt5frames import *
+from asyncframes.pyqt5_eventloop import EventLoop
+
+LEVELS = ["DEBUG", "INFO", "INFO", "INFO", "WARNING", "ERROR"]
+
+@MainWindow(size=(600, 400), title="Log View Example")
+async def logview_example():
+    with VBoxLayout():
+        search = LineEdit()
+        search.setPlaceholderText("Filter")
+        console = PlainTextEdit()
+    console.enable_log_view(max_lines=5000) # Keep the last 5000 lines
+
+    @Frame
+    async def apply_filter(event):
+        console.set_log_filter(event.args[0])
+    latest(debounce(search.textChanged, 200), apply_filter)
+
+    i = 0
+    while True: # Log about 5000 lines per second
+        for _ in range(50):
+            console.log("{:8d} {:7s} message {}".format(i, random.choice(LEVELS), random.randrange(1000)))
+            i += 1
+        await sleep(0.01)
+
+loop = EventLoop()
+loop.run(logview_example)
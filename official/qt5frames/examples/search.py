@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Sebastian Klaassen. All Rights Reserved.
+# Distributed under the MIT License. See LICENSE file for more info.
+
+from asyncframes import Frame, hold, sleep
+from qt5frames import *
+from asyncframes.pyqt5_eventloop import EventLoop
+
+ITEMS = ["item {}".format(i) for i in range(1000000)]
+CHUNK_SIZE = 50000
+
+@MainWindow(size=(300, 400), title="Search As You Type Example")
+async def search_example():
+    with VBoxLayout():
+        query = LineEdit()
+        status = Label("")
+        results = PlainTextEdit()
+
+    @Frame
+    async def search(event):
+        text, matches = event.args[0], []
+        for i in range(0, len(ITEMS), CHUNK_SIZE):
+            status.setText("Searching... {}%".format(100 * i // len(ITEMS)))
+            matches.extend(item for item in ITEMS[i:i + CHUNK_SIZE] if text in item)
+            await sleep(0) # Yield, so that the search can be canceled when the query changes
+        status.setText("{} matches".format(len(matches)))
+        results.setPlainText("\n".join(matches[:1000]))
+
+    # Search 300 ms after the last keystroke and cancel searches for outdated queries
+    latest(debounce(query.textChanged, 300), search)
+    await hold()
+
+loop = EventLoop()
+loop.run(search_example)
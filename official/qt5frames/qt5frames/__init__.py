@@ -3,21 +3,27 @@
 # Distributed under the MIT License. See LICENSE file for more info.
 
 import abc
+import bisect
+import collections
+import contextlib
 import functools
+import itertools
+import math
 import numbers
-try:
-    import quaternion
-except ImportError:
-    pass
+import numpy as np
 import re
+import time
+import weakref
 from multipledispatch import dispatch
-from PyQt5 import QtWidgets, QtGui, QtCore, QtChart
+from PyQt5 import QtWidgets, QtGui, QtCore, QtChart, sip
 from PyQt5.QtWidgets import QWidget, QMainWindow, QDialog, QGroupBox, QTabWidget, QLayout, QHBoxLayout, QVBoxLayout, QGridLayout, QFormLayout, QStackedLayout
 from PyQt5.QtCore import Qt, QObject, QRect, QPointF, QRectF
 from PyQt5.QtGui import QTransform, QPixmap
-from asyncframes import Event, Frame, PFrame, FrameMeta, Primitive, hold, sleep, any_, find_parent
+from asyncframes import Event, Frame, PFrame, FrameMeta, Primitive, InvalidOperationException, hold, sleep, any_, _THREAD_LOCALS
 from .linalg import *
 from .keys import Keys
+from .profiling import PaintProfiler, PaintProfilerOverlay
+from .images import PixmapCache, ImageLoader, ThumbnailCache, load_image
 
 
 __all__ = [
@@ -28,18 +34,156 @@ __all__ = [
     'Widget', 'PushButton', 'CheckBox', 'Label', 'PlainTextEdit', 'LineEdit', 'TextBrowser', 'LCDNumber', 'ProgressBar', 'ComboBox', 'Slider', 'Border', 'ListView', 'ListWidget', 'TreeView', 'TableView', 'ChartView', 'PlotWidget', 'DialogButtonBox',
 
     # Shapes
-    'Shape', 'Line', 'Lines', 'Polyline', 'Rect', 'Circle', 'Text', 'Image',
+    'Shape', 'Line', 'Lines', 'Polyline', 'Rect', 'Circle', 'Text', 'Image', 'PlotSeries',
 
     # Other
-    'StandardItemModel', 'StandardItem', 'ListWidgetItem',
+    'StandardItemModel', 'StandardItem', 'ListWidgetItem', 'FrameClock', 'next_frame', 'debounce', 'throttle', 'batch', 'latest', 'PixmapCache', 'ImageLoader', 'ThumbnailCache', 'load_image',
 ]
 __version__ = '0.0.1'
 
 
 class QtEvent(object):
+    __slots__ = ('sender', 'args', 'handled')
+
     def __init__(self, sender, *args):
         self.sender = sender
         self.args = args
+        self.handled = False # If set to True by an awaiting frame, the event isn't passed on to Qt's default handler
+
+class FrameClock(object):
+    """
+    A shared timer that resumes all frames awaiting the next frame once per tick
+
+    Awaiting `next_frame()` returns the real time in seconds since the previous tick. The timer only runs while frames await it.
+    If fps is None, the refresh rate of the primary screen is used.
+    If skip_frames is True, ticks missed under load are merged into a single tick. Otherwise missed ticks are delivered one after another.
+    """
+    def __init__(self, name, fps=None, skip_frames=True):
+        self.fps = fps
+        self.skip_frames = skip_frames
+        self.tick = Event(name + ".tick")
+        self._interval = None
+        self._last_tick = None
+        self._timer = QtCore.QTimer()
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._ontimeout)
+
+    def next_frame(self):
+        if not self._timer.isActive():
+            fps = self.fps
+            if not fps:
+                screen = QtGui.QGuiApplication.primaryScreen()
+                fps = screen.refreshRate() if screen is not None else 60.0
+            self._interval = 1.0 / fps
+            self._last_tick = time.perf_counter()
+            self._timer.start(max(1, round(1000 * self._interval)))
+        return self.tick
+
+    def stop(self):
+        self._timer.stop()
+
+    def _ontimeout(self):
+        now = time.perf_counter()
+        dt = now - self._last_tick
+        self._last_tick = now
+
+        num_ticks = 1 if self.skip_frames else max(1, int(dt / self._interval))
+        for _ in range(num_ticks):
+            self.tick.send(dt / num_ticks)
+            if not self.tick._listeners: # If no frame awaits the next frame anymore, ...
+                self._timer.stop() # Stop the timer until next_frame() is called again
+                break
+
+def next_frame():
+    """
+    Return an awaitable that resumes the current frame on the next tick of the closest Canvas or MainWindow
+    """
+    parent = _find_parent((Canvas, MainWindow))
+    if parent is None:
+        raise Exception("next_frame() needs to be called inside a Canvas or MainWindow")
+    return parent.clock.next_frame()
+
+@contextlib.contextmanager
+def _current_frame(frame):
+    """
+    Make frame the current frame of asyncframes inside the with-block and restore the previous current frame afterwards
+
+    Awaitables created while frame is None aren't registered with any frame.
+    """
+    previous_frame = _THREAD_LOCALS._current_frame
+    _THREAD_LOCALS._current_frame = frame
+    try:
+        yield
+    finally:
+        _THREAD_LOCALS._current_frame = previous_frame
+
+def _non_with_frame_parent(frame):
+    """
+    Find the closest frame that isn't a with-frame, starting at frame, like asyncframes does when activating with-frames
+    """
+    while frame._is_inline_frame:
+        frame = frame._parent
+    return frame
+
+@contextlib.contextmanager
+def _with_frame(frame):
+    """
+    Activate frame inside the with-block the way asyncframes activates with-frames and reactivate the previous frame afterwards
+
+    Unlike a with-frame, frame may already exist anywhere in the frame hierarchy.
+    The active with-frames of both the current non-with frame and the non-with parent of frame are restored afterwards,
+    so that with-frames nested inside the with-block can't leave either of them pointing at frame.
+    """
+    previous_frame = _THREAD_LOCALS._current_frame
+    non_with_frames = [_non_with_frame_parent(previous_frame), _non_with_frame_parent(frame)]
+    inline_frames = [non_with_frame._current_inline_frame for non_with_frame in non_with_frames]
+    non_with_frames[0]._current_inline_frame = frame
+    _THREAD_LOCALS._current_frame = frame
+    try:
+        yield
+    finally:
+        for non_with_frame, inline_frame in reversed(list(zip(non_with_frames, inline_frames))):
+            non_with_frame._current_inline_frame = inline_frame
+        _THREAD_LOCALS._current_frame = previous_frame
+
+def _find_parent(parenttype):
+    """
+    Find the closest parent frame of the given type (or tuple of types), like asyncframes.find_parent()
+
+    The ancestors of a frame never change, so results are memoized on every frame that is visited on the way up the frame hierarchy.
+    Each frame walks up the hierarchy at most once per parent type. Later lookups take constant time, regardless of the depth of the hierarchy.
+    """
+    frame = _THREAD_LOCALS._current_frame
+    visited = [] # Memos of frames that don't know their parent of type parenttype yet
+    parent = None
+    while frame is not None:
+        try:
+            memo = frame._parent_memo
+        except AttributeError:
+            memo = frame._parent_memo = {}
+        if parenttype in memo:
+            parent = memo[parenttype]
+            break
+        visited.append(memo)
+        if isinstance(frame, parenttype):
+            parent = frame
+            break
+        frame = frame._parent
+    for memo in visited:
+        memo[parenttype] = parent
+    return parent
+
+def _init_primitive(primitive, owner):
+    """
+    Register primitive with the closest parent frame of class owner
+
+    Equivalent to Primitive.__init__(primitive, owner), but with a memoized parent lookup.
+    """
+    primitive._removed = False
+    primitive._owner = _find_parent(owner)
+    if primitive._owner is None:
+        raise InvalidOperationException(primitive.__class__.__name__ + " can't be defined outside " + owner.__name__)
+    primitive._owner._primitives.append(primitive)
 
 # ------------------------------------------------------------------------------
 # Widget Containers
@@ -48,10 +192,136 @@ class QtEvent(object):
 class QtFrame(type(QObject), FrameMeta):
     pass
 
+class _Reconciliation(object):
+    """
+    State of a Container.reconcile() pass
+    """
+    def __init__(self, container):
+        self.container = container
+        self.keyed_widgets = container._keyed_widgets # (Widget class, key) -> widget of the previous pass
+        container._keyed_widgets = {}
+        self.old_widgets = [primitive for primitive in container._primitives if isinstance(primitive, Widget)]
+        self.old_frames = [child for child in container._children if isinstance(child, QWidget)]
+        self.reused = set()
+
+        # Take all items out of the layout, so that they are re-added in the order of the new pass
+        layout = container._layout
+        if layout is not None:
+            while layout.count():
+                widget = layout.takeAt(0).widget()
+                if widget is not None and not isinstance(widget, (Widget, Frame)): # If the widget was created by the layout (e.g. a QFormLayout label), ...
+                    widget.setParent(None)
+                    widget.deleteLater()
+
+    def reuse(self, cls, key, args, kwargs):
+        widget = self.keyed_widgets.pop((cls, key), None)
+        if widget is None or widget._removed or not widget._update(args):
+            return None
+        self.container._add_child(widget, kwargs)
+        self.reused.add(id(widget))
+        return widget
+
+    def finish(self):
+        # Remove widgets and child containers of the previous pass that weren't reused
+        for widget in self.old_widgets:
+            if id(widget) not in self.reused:
+                widget.remove()
+        for frame in self.old_frames:
+            frame.remove()
+            if not sip.isdeleted(frame):
+                frame.setParent(None)
+                frame.deleteLater()
+
+class _LazyPage(object):
+    """
+    State of a container whose frame body runs the first time the container is shown
+
+    If unload_after is given, the children of the page are removed when the page has been hidden for unload_after seconds.
+    The frame body runs again the next time the page is shown.
+    """
+    def __init__(self, container, unload_after, placeholder):
+        self.container = container
+        self.placeholder_text = placeholder
+        self.placeholder = None
+        self.body = None # (framefunc, frameargs, framekwargs) of the page
+        self.built = False
+        self.own_children = set() # Ids of the children the frame had before its body ran
+        if unload_after is not None:
+            self.unload_timer = QtCore.QTimer(container)
+            self.unload_timer.setSingleShot(True)
+            self.unload_timer.setInterval(int(1000 * unload_after))
+            self.unload_timer.timeout.connect(self.unload)
+        else:
+            self.unload_timer = None
+
+    def defer(self, framefunc, frameargs, framekwargs):
+        self.body = (framefunc, frameargs, framekwargs)
+        self.show_placeholder()
+
+    def show_placeholder(self):
+        if self.placeholder_text is None or self.placeholder is not None: return
+        self.placeholder = QtWidgets.QLabel(self.placeholder_text, self.container)
+        self.placeholder.setAlignment(Qt.AlignCenter)
+        if self.container._layout is not None:
+            self.container._layout.addWidget(self.placeholder)
+        else:
+            self.placeholder.adjustSize()
+        self.placeholder.show()
+
+    def hide_placeholder(self):
+        if self.placeholder is None: return
+        if self.container._layout is not None:
+            self.container._layout.removeWidget(self.placeholder)
+        self.placeholder.setParent(None)
+        self.placeholder.deleteLater()
+        self.placeholder = None
+
+    def onshow(self):
+        if self.unload_timer is not None:
+            self.unload_timer.stop()
+        self.build()
+
+    def onhide(self):
+        if self.unload_timer is not None and self.built:
+            self.unload_timer.start()
+
+    def build(self):
+        if self.body is None or self.built or self.container.removed: return
+        self.built = True
+        self.hide_placeholder()
+        self.own_children = set(id(child) for child in self.container._children)
+        framefunc, frameargs, framekwargs = self.body
+        with _current_frame(_THREAD_LOCALS._current_frame): # The page is built from within a Qt event, so restore the active frame afterwards
+            self.container._run_body(framefunc, frameargs, framekwargs)
+
+    def unload(self):
+        container = self.container
+        if not self.built or container.removed or container.isVisible(): return
+        self.built = False
+
+        # Stop the frame body and remove everything it created
+        if container._generator is not None:
+            container._generator.close()
+            container._generator = None
+        for child in reversed(container._children[:]):
+            if id(child) in self.own_children: continue
+            child.remove()
+            if isinstance(child, QWidget) and not sip.isdeleted(child):
+                child.setParent(None)
+                child.deleteLater()
+        while container._primitives:
+            container._primitives[-1].remove()
+        container._keyed_widgets = {}
+        self.show_placeholder()
+
 class Container(Frame, metaclass=QtFrame):
-    def __init__(self, size=None, layout=None):
+    def __init__(self, size=None, layout=None, lazy=False, unload_after=None, placeholder=None):
         if not isinstance(self, QWidget): raise Exception("The Container class shouldn't be used directly. Use a layout class instead")
         super().__init__()
+        self._keyed_widgets = {}
+        self._reconciliation = None
+        self._pending_widgets = None # Children queued while this container is being constructed
+        self._lazy = _LazyPage(self, unload_after, placeholder) if lazy else None
         if size:
             self.resize(*size)
         if layout is not None:
@@ -60,6 +330,118 @@ class Container(Frame, metaclass=QtFrame):
         else:
             self._layout = None
 
+    @contextlib.contextmanager
+    def reconcile(self):
+        """
+        Rebuild the children of this container, reusing keyed widgets
+
+        Widgets created inside the with-block with a `key` keyword argument reuse the widget of the same class and key from the previous build,
+        updating its text in place if needed. Widgets are (re-)added to the layout in the order of the with-block.
+        Widgets and child containers of the previous build that weren't reused are removed when the with-block ends.
+
+        Example: ::
+
+            with form.reconcile():
+                for user in users:
+                    Label(user.name, key=user.id)
+        """
+        if self._reconciliation is not None:
+            raise Exception("Container.reconcile() can't be nested")
+        self._reconciliation = _Reconciliation(self)
+        constructing = self._pending_widgets is None
+        if constructing:
+            self._begin_construction()
+        try:
+            with _with_frame(self): # Activate this container, so that new widgets are added to it
+                yield self
+        finally:
+            reconciliation, self._reconciliation = self._reconciliation, None
+            reconciliation.finish()
+            if constructing:
+                self._end_construction()
+
+    def create(self, framefunc, *frameargs, **framekwargs):
+        if self._lazy is not None and not self.isVisible(): # If this is a lazy page that isn't shown yet, ...
+            self._lazy.defer(framefunc, frameargs, framekwargs)
+        else:
+            self._run_body(framefunc, frameargs, framekwargs)
+
+    def _run_body(self, framefunc, frameargs, framekwargs):
+        self._begin_construction()
+        super().create(framefunc, *frameargs, **framekwargs)
+        if self.ready: # If the frame function already returned or awaited (i.e. it isn't a delayed coroutine), ...
+            self._end_construction()
+
+    def showEvent(self, event):
+        if self._lazy is not None:
+            self._lazy.onshow()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        if self._lazy is not None:
+            self._lazy.onhide()
+        super().hideEvent(event)
+
+    def _step(self, sender, msg):
+        try:
+            super()._step(sender, msg)
+        finally:
+            if self._pending_widgets is not None: # If this was the first step of a delayed coroutine, ...
+                self._end_construction()
+
+    def _begin_construction(self):
+        """
+        Queue children instead of adding them to the layout one by one
+        """
+        self._pending_widgets = []
+
+    def _end_construction(self):
+        """
+        Add all queued children to the layout in a single batch and lay them out once
+        """
+        added = self._flush_pending_widgets()
+        self._pending_widgets = None
+        if added and self._layout is not None:
+            self._layout.activate()
+
+    def _flush_pending_widgets(self):
+        """
+        Add the children queued so far to the layout in a single batch
+
+        Construction continues afterwards. Methods that modify or query the layout call this first, so that they see all children created before them.
+        Returns True if any children were added.
+        """
+        pending_widgets = self._pending_widgets
+        if not pending_widgets or sip.isdeleted(self): return False
+        self._pending_widgets = None # Add the queued children directly
+        updates_enabled = self.updatesEnabled()
+        self.setUpdatesEnabled(False)
+        try:
+            for child, kwargs in pending_widgets:
+                if not child._removed and not sip.isdeleted(child):
+                    self._add_child(child, kwargs)
+        finally:
+            self.setUpdatesEnabled(updates_enabled)
+            self._pending_widgets = []
+        return True
+
+    def _add_child(self, child, kwargs):
+        """
+        Add a widget or child container to this container
+
+        While this container is being constructed, children are queued until construction ends.
+        """
+        if self._pending_widgets is not None: # If this container is being constructed, ...
+            if child.parentWidget() is None:
+                child.setParent(self) # Keep child containers from showing up as top-level windows
+            self._pending_widgets.append((child, kwargs))
+        elif isinstance(child, Widget):
+            child.resize(child.sizeHint())
+            self.add_widget(child, **kwargs)
+            child.show()
+        else:
+            self.add_widget(child, **kwargs)
+
     def add_widget(self, widget, **kwargs):
         if self._layout is None: return
         if type(self._layout) == QGridLayout and 'row' in kwargs and 'col' in kwargs:
@@ -80,10 +462,31 @@ class Container(Frame, metaclass=QtFrame):
         self._layout.removeWidget(widget)
 
     def setCurrentIndex(self, index):
+        self._flush_pending_widgets()
         if type(self._layout) == QStackedLayout: self._layout.setCurrentIndex(index)
     def setCurrentWidget(self, widget):
+        self._flush_pending_widgets()
         if type(self._layout) == QStackedLayout: self._layout.setCurrentWidget(widget)
 
+class _ContainerFactory(Container.Factory):
+    """
+    Queue the children of a container created with a with-statement until the with-block ends
+    """
+    def __enter__(self):
+        container = super().__enter__()
+        if container._lazy is not None: # If the container is a lazy page, ...
+            container._lazy.build() # The body of a with-block can't be deferred
+        container._begin_construction()
+        return container
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        container = _find_parent(Container)
+        super().__exit__(exc_type, exc_val, exc_tb)
+        if container is not None:
+            container._end_construction()
+Container.Factory = _ContainerFactory
+_ContainerFactory.frameclass = Container
+
 class MainWindow(Container, QMainWindow):
     def __init__(self, size=None, title=None, modal=False):
         QMainWindow.__init__(self)
@@ -97,6 +500,7 @@ class MainWindow(Container, QMainWindow):
             self.setWindowModality(Qt.ApplicationModal)
         self.closed = Event("MainWindow.closed")
         self.resized = Event("MainWindow.resized")
+        self.clock = FrameClock("MainWindow")
 
     def create(self, framefunc, *frameargs, size=None, title=None, **framekwargs):
         if size:
@@ -107,6 +511,7 @@ class MainWindow(Container, QMainWindow):
         self.show()
 
     def _ondispose(self):
+        self.clock.stop()
         self.deleteLater()
         super()._ondispose()
 
@@ -115,6 +520,9 @@ class MainWindow(Container, QMainWindow):
         if event.isAccepted(): # If event wasn't canceled by user
             self.remove()
 
+    def next_frame(self):
+        return self.clock.next_frame()
+
     def resizeEvent(self, event):
         self.resized.send(QtEvent(self, event))
 
@@ -172,19 +580,20 @@ class Layout(Container, QWidget):
     form = QFormLayout
     stacked = QStackedLayout
 
-    def __init__(self, layout=None, **kwargs):
+    def __init__(self, layout=None, lazy=False, unload_after=None, placeholder=None, **kwargs):
         QWidget.__init__(self)
-        Container.__init__(self, layout=layout)
-        parent = find_parent(Container)
+        Container.__init__(self, layout=layout, lazy=lazy, unload_after=unload_after, placeholder=placeholder)
+        parent = _find_parent(Container)
         if parent is None:
             raise Exception("Layouts need to be defined inside a MainWindow or Dialog")
-        parent.add_widget(self, **kwargs)
+        parent._add_child(self, kwargs)
 
 class HBoxLayout(Layout):
     def __init__(self, **kwargs):
         super().__init__(Layout.hbox, **kwargs)
 
     def addStretch(self, stretch = 0):
+        self._flush_pending_widgets() # Keep the stretch behind the children created before it
         self._layout.addStretch(stretch)
 
 class VBoxLayout(Layout):
@@ -192,6 +601,7 @@ class VBoxLayout(Layout):
         super().__init__(Layout.vbox, **kwargs)
 
     def addStretch(self, stretch = 0):
+        self._flush_pending_widgets() # Keep the stretch behind the children created before it
         self._layout.addStretch(stretch)
 
 class GridLayout(Layout):
@@ -210,10 +620,10 @@ class GroupBox(Container, QGroupBox):
     def __init__(self, size=None, title=None, layout=None, **kwargs):
         QGroupBox.__init__(self)
         Container.__init__(self, layout=layout)
-        parent = find_parent(Container)
+        parent = _find_parent(Container)
         if parent is None:
             raise Exception("GroupBox needs to be defined inside a MainWindow or Dialog")
-        parent.add_widget(self, **kwargs)
+        parent._add_child(self, kwargs)
         if size:
             self.resize(*size)
         if title is not None:
@@ -223,47 +633,95 @@ class TabWidget(Container, QTabWidget):
     def __init__(self, size=None, layout=None, **kwargs):
         QTabWidget.__init__(self)
         Container.__init__(self, layout=layout)
-        parent = find_parent(Container)
+        parent = _find_parent(Container)
         if parent is None:
             raise Exception("TabWidget needs to be defined inside a MainWindow or Dialog")
-        parent.add_widget(self, **kwargs)
+        parent._add_child(self, kwargs)
         if size:
             self.resize(*size)
 
+    def setCurrentIndex(self, index):
+        QTabWidget.setCurrentIndex(self, index)
+    def setCurrentWidget(self, widget):
+        QTabWidget.setCurrentWidget(self, widget)
+
 class TabPage(Container, QWidget):
+    """
+    A page of a TabWidget
+
+    If lazy is True, the frame body of the page runs the first time the page becomes current, showing the text placeholder (if any) until then.
+    If unload_after is also given, the contents of the page are removed after it hasn't been current for unload_after seconds and rebuilt the next time it becomes current.
+    Layouts inside a StackedLayout accept the same arguments.
+    """
     @dispatch(QtGui.QIcon, str)
-    def __init__(self, icon, label, layout=None):
+    def __init__(self, icon, label, layout=None, lazy=False, unload_after=None, placeholder=None):
         QWidget.__init__(self)
-        Container.__init__(self, layout=layout)
-        parent = find_parent(TabWidget)
+        Container.__init__(self, layout=layout, lazy=lazy, unload_after=unload_after, placeholder=placeholder)
+        parent = _find_parent(TabWidget)
         if parent is None:
             raise Exception("TabPage needs to be defined inside a TabWidget")
         parent.addTab(self, icon, label)
     @dispatch(str)
-    def __init__(self, label, layout=None):
+    def __init__(self, label, layout=None, lazy=False, unload_after=None, placeholder=None):
         QWidget.__init__(self)
-        Container.__init__(self, layout=layout)
-        parent = find_parent(TabWidget)
+        Container.__init__(self, layout=layout, lazy=lazy, unload_after=unload_after, placeholder=placeholder)
+        parent = _find_parent(TabWidget)
         if parent is None:
             raise Exception("TabPage needs to be defined inside a TabWidget")
         parent.addTab(self, label)
 
+def _rot_to_angle(rot):
+    """
+    Convert a rotation to an angle around the z-axis
+
+    Rotations are either given as angles in radians or as quaternions. The x- and y-components of quaternions are ignored, since canvases are two-dimensional.
+    """
+    if isinstance(rot, numbers.Number):
+        return float(rot)
+    return 2.0 * math.atan2(rot.z, rot.w)
+
+def _update_transforms(layers):
+    """
+    Recompute the transform matrices of all given canvas layers in a single vectorized pass
+    """
+    layers = list(layers)
+    if not layers: return
+    angles = np.fromiter((layer._angle for layer in layers), np.float64, len(layers))
+    scl = np.array([layer._scl for layer in layers], np.float64)
+    pos = np.array([layer._pos for layer in layers], np.float64)
+    c = np.cos(angles)
+    s = np.sin(angles)
+
+    matrices = np.zeros((len(layers), 9))
+    matrices[:, 0] = c * scl[:, 0]
+    matrices[:, 1] = s * scl[:, 0]
+    matrices[:, 3] = -s * scl[:, 1]
+    matrices[:, 4] = c * scl[:, 1]
+    matrices[:, 6:8] = pos
+    matrices[:, 8] = 1.0
+
+    for layer, matrix in zip(layers, matrices.tolist()):
+        layer.transform.setMatrix(*matrix)
+
 class CanvasLayer(Frame):
     def __init__(self, pos=None, rot=None, scl=None):
         super().__init__()
         self._pos = vec2(0, 0) if pos is None else pos
-        self._rot = quat() if rot is None else rot
+        self._rot = 0.0 if rot is None else rot
         self._scl = vec2(1, 1) if scl is None else scl
 
         if isinstance(self, Canvas) or isinstance(self, Pixmap):
             self._canvas = self
             self._parentLayer = None
+            self._dirty_layers = None # Layers awaiting a transform update, while a batch is active
+            self.pixmap_cache = PixmapCache()
+            self.culling = False # If True, shapes outside the painted area are skipped
         else:
             # Find parent frame of class Canvas
-            self._canvas = find_parent((Canvas, Pixmap))
+            self._canvas = _find_parent((Canvas, Pixmap))
             if self._canvas is None:
                 raise Exception("CanvasLayer can't be defined outside Canvas")
-            self._parentLayer = find_parent(CanvasLayer)
+            self._parentLayer = _find_parent(CanvasLayer)
             self._parentLayer.shapes.append(self)
 
         self.shapes = []
@@ -283,29 +741,66 @@ class CanvasLayer(Frame):
         if rot is not None: self._rot = rot
         if scl is not None: self._scl = scl
 
-        if isinstance(self._rot, numbers.Number): self._rot = quat.from_axis_angle(vec3(0, 0, 1), self._rot)
+        self._angle = _rot_to_angle(self._rot)
         if isinstance(self._scl, numbers.Number): self._scl = vec2(self._scl, self._scl)
 
-        self._update_transform() # Update transform matrix to reflect self._pos, self._rot and self._scl
+        self._update_transform() # Update transform matrix to reflect self._pos, self._angle and self._scl
 
         super().create(framefunc, *frameargs, **framekwargs)
 
     def _update_transform(self):
-        rmat = quaternion.as_rotation_matrix(self._rot)
+        if self._canvas._dirty_layers is not None: # If a batch is active, ...
+            self._canvas._dirty_layers[self] = None # Defer the update until the batch ends
+            return
+
+        # Closed-form scale, followed by rotation around the z-axis, followed by translation
+        c = math.cos(self._angle)
+        s = math.sin(self._angle)
+        sx, sy = self._scl
+        px, py = self._pos
 
         self.transform.setMatrix(
-            rmat[0, 0] * self._scl.x, rmat[1, 0],               rmat[2, 0],
-            rmat[0, 1],               rmat[1, 1] * self._scl.y, rmat[2, 1],
-            rmat[0, 2] + self._pos.x, rmat[1, 2] + self._pos.y, rmat[2, 2]
+            c * sx,  s * sx, 0.0,
+            -s * sy, c * sy, 0.0,
+            px,      py,     1.0
         )
 
         #TODO: Recursively update child transform's
 
         self._canvas.update()
 
+    def _visible_rect(self, painter):
+        # Map the painted area from device coordinates into this layer's coordinates
+        inverse, invertible = self.transform.inverted()
+        return inverse.mapRect(QRectF(painter.viewport())) if invertible else QRectF()
+
+    def bounds(self):
+        return None # Layers are never culled, since their shapes are culled individually
+
     def draw(self, painter):
+        if not self._canvas.culling: # If culling is disabled, draw without computing any bounds
+            for shape in self.shapes:
+                shape.draw(painter)
+            return
+        visible = self._visible_rect(painter)
+        for shape in self.shapes:
+            bounds = shape.bounds()
+            if bounds is None or visible.intersects(bounds):
+                shape.draw(painter)
+
+    def _draw_profiled(self, painter, profiler):
+        visible = self._visible_rect(painter) if self._canvas.culling else None
         for shape in self.shapes:
-            shape.draw(painter)
+            if isinstance(shape, CanvasLayer):
+                shape._draw_profiled(painter, profiler)
+                continue
+            bounds = shape.bounds() if visible is not None else None
+            if bounds is None or visible.intersects(bounds):
+                t0 = time.perf_counter()
+                shape.draw(painter)
+                profiler._record_shape(shape, time.perf_counter() - t0)
+            else:
+                profiler._record_culled()
 
     @property
     def pos(self):
@@ -320,9 +815,17 @@ class CanvasLayer(Frame):
         return self._rot
     @rot.setter
     def rot(self, value):
-        self._rot = value # Set new self._rot
-        if isinstance(self._rot, numbers.Number): self._rot = quat.from_axis_angle(vec3(0, 0, 1), self._rot)
-        self._update_transform()
+        self._rot = value # Set new self._rot (either an angle in radians or a quaternion)
+        self._angle = _rot_to_angle(value)
+        self._update_transform() # Update self.transform
+
+    @property
+    def angle(self):
+        return self._angle
+    @angle.setter
+    def angle(self, value):
+        self._rot = self._angle = float(value) # Set new self._rot as an angle in radians
+        self._update_transform() # Update self.transform
 
     @property
     def scl(self):
@@ -334,18 +837,101 @@ class CanvasLayer(Frame):
         self._update_transform() # Update self.transform
 
 class Canvas(CanvasLayer, QWidget, metaclass=QtFrame):
-    def __init__(self, size=None, pos=None, rot=None, scl=None, **kwargs):
+    """
+    A widget drawing a tree of canvas layers and shapes
+
+    If culling is True, shapes whose bounds() don't intersect the painted area are skipped.
+    Culling pays off for large scenes that are mostly off-screen, but costs a bounds check per shape and paint, so it's disabled by default.
+    """
+    def __init__(self, size=None, pos=None, rot=None, scl=None, culling=False, **kwargs):
         CanvasLayer.__init__(self, pos, rot, scl)
         QWidget.__init__(self)
-        parent = find_parent(Container)
+        parent = _find_parent(Container)
         if parent is None:
             raise Exception("StackedLayout needs to be defined inside a MainWindow or Dialog")
-        parent.add_widget(self, **kwargs)
+        parent._add_child(self, kwargs)
         if size is not None:
             self.resize(*size)
         self.setBackgroundRole(QtGui.QPalette.Base)
         self.setAutoFillBackground(True)
+        self.clock = FrameClock("Canvas")
+        self.culling = culling
+        self.profiler = None
+        self._profiler_overlay = None
         self.show()
+
+    def enable_profiler(self, overlay=False, history=120):
+        """
+        Start recording paint statistics of this canvas
+
+        Returns the PaintProfiler that collects the statistics. If overlay is True, the statistics are shown on top of the canvas.
+        """
+        if self.profiler is None:
+            self.profiler = PaintProfiler(history)
+        if overlay and self._profiler_overlay is None:
+            self._profiler_overlay = PaintProfilerOverlay(self.profiler, self)
+        return self.profiler
+
+    def disable_profiler(self):
+        if self._profiler_overlay is not None:
+            self._profiler_overlay.deleteLater()
+            self._profiler_overlay = None
+        self.profiler = None
+
+    def next_frame(self):
+        return self.clock.next_frame()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Defer transform updates of all layers on this canvas until the end of the with-block
+
+        Transforms of all modified layers are recomputed in a single vectorized pass and the canvas is repainted once.
+        Nested batches are merged into the outermost batch.
+        """
+        if self._dirty_layers is not None: # If a batch is already active, ...
+            yield self
+            return
+        self._dirty_layers = {}
+        try:
+            yield self
+        finally:
+            dirty_layers, self._dirty_layers = self._dirty_layers, None
+            if dirty_layers:
+                _update_transforms(dirty_layers)
+                self.update()
+
+    def set_transforms(self, layers, pos=None, rot=None, scl=None):
+        """
+        Set positions, rotations and/or scales of many layers of this canvas at once
+
+        pos is an array of shape (N, 2). rot is either an array of N angles in radians or an array of N quaternions of shape (N, 4), such as a quata.
+        scl is either an array of N uniform scales or an array of shape (N, 2).
+        """
+        layers = list(layers)
+        with self.batch():
+            if pos is not None:
+                # Rows of a vec2 view are vec2 instances, so layers receive vec2 positions without per-layer construction
+                for layer, p in zip(layers, np.array(pos, np.float32).reshape(-1, 2).view(vec2)):
+                    layer._pos = p
+            if rot is not None:
+                rot = np.asarray(rot)
+                if rot.ndim == 2: # If rot is an array of quaternions, ...
+                    rot = 2.0 * np.arctan2(rot[:, 3], rot[:, 0])
+                    angles = rot.tolist()
+                elif rot.dtype.kind not in 'iuf': # If rot is a sequence of quaternion objects, ...
+                    angles = [_rot_to_angle(r) for r in rot]
+                else:
+                    angles = rot.tolist()
+                for layer, angle in zip(layers, angles):
+                    layer._rot = layer._angle = angle
+            if scl is not None:
+                scl = np.array(scl, np.float32)
+                if scl.ndim == 1: # If scl contains uniform scales, ...
+                    scl = np.repeat(scl[:, np.newaxis], 2, axis=1)
+                for layer, s in zip(layers, scl.view(vec2)):
+                    layer._scl = s
+            self._dirty_layers.update(dict.fromkeys(layers))
     def paintEvent(self, event):
         painter = QtGui.QPainter()
         painter.begin(self)
@@ -353,10 +939,14 @@ class Canvas(CanvasLayer, QWidget, metaclass=QtFrame):
         #painter.drawRect(QRect(0, 0, self.width() - 1, self.height() - 1))
         #painter.setPen(QtGui.QPen(Qt.blue))
         #painter.drawLine(0, 0, 100, 100)
-        self.draw(painter)
+        if self.profiler is None:
+            self.draw(painter)
+        else:
+            self.profiler._paint(self, painter)
         painter.end()
     def _ondispose(self):
-        parent = find_parent(Container)
+        self.clock.stop()
+        parent = _find_parent(Container)
         parent.remove_widget(self)
         self.setParent(None)
         self.deleteLater()
@@ -402,65 +992,464 @@ def _create_properties(src, dest):
         except TypeError:
             continue
         if callable(getter) and key in setters:
-            setattr(dest, key, property(getter, setters[key])) # Overwrite getter with property
+            setattr(dest, key, _property(dest, key, getter, setters[key])) # Overwrite getter with property
+
+def _property(cls, key, getter, setter):
+    """
+    Create a property from a getter/setter pair
+
+    Properties of widgets buffer writes while the widget's coalesce_properties attribute is True (see Widget.flush_properties()).
+    """
+    if not issubclass(cls, Widget):
+        return property(getter, setter)
+
+    def get(self):
+        pending_writes = self._pending_writes
+        if pending_writes and key in pending_writes: # If a write to this property is buffered, ...
+            return pending_writes[key][1]
+        return getter(self)
+    def set(self, value):
+        if not self.coalesce_properties:
+            setter(self, value)
+            return
+        if self._pending_writes is None: # If this is the first buffered write during the current tick, ...
+            self._pending_writes = {}
+            QtCore.QTimer.singleShot(0, self.flush_properties)
+        self._pending_writes[key] = (setter, value)
+    return property(get, set)
+
+def _bound_signal(obj, key):
+    """
+    Return signal key of obj, even if the signal has been replaced by an awaitable
+    """
+    return getattr(type(obj), key).__get__(obj, type(obj))
+
+class _SignalEvent(Event):
+    """
+    The awaitable of a Qt signal, posted with a QtEvent of the signal's arguments whenever the signal is emitted
+
+    The signal is connected to a bound method of the event, which Qt only references weakly, and the event only references the emitting object weakly.
+    Thus, connections never keep disposed widgets or their awaitables alive.
+    """
+    def __init__(self, obj, key):
+        super().__init__("{}.{}".format(obj.__class__.__name__, key))
+        self._sender = weakref.ref(obj)
+        self._key = key
+
+    def _onemitted(self, *args):
+        sender = self._sender()
+        if sender is not None:
+            self.post(QtEvent(sender, *args))
+
+    def connect(self, slot):
+        _bound_signal(self._sender(), self._key).connect(slot) # Preserve pyqtBoundSignal.connect()
+    def emit(self, *args):
+        _bound_signal(self._sender(), self._key).emit(*args) # Preserve pyqtBoundSignal.emit()
+
+def _bind_signal(obj, key):
+    awaitable = _SignalEvent(obj, key)
+    _bound_signal(obj, key).connect(awaitable._onemitted)
+    obj._signals[key] = awaitable
+    setattr(obj, key, awaitable)
+
+_signal_names = {} # Class -> names of all signals of the class
 
 def _convert_all_signals_to_awaitables(obj):
-    for key in dir(obj.__class__):
+    cls = obj.__class__
+    signal_names = _signal_names.get(cls)
+    if signal_names is None: # If the signals of this class haven't been looked up yet, ...
+        signal_names = []
+        for key in dir(cls):
+            try:
+                signal = getattr(obj, key)
+            except TypeError:
+                continue
+            if type(signal) == QtCore.pyqtBoundSignal:
+                signal_names.append(key)
+        _signal_names[cls] = signal_names
+
+    obj._signals = {}
+    with _current_frame(None): # Don't register the awaitables with the current frame (see Widget.__init__())
+        for key in signal_names:
+            _bind_signal(obj, key)
+
+def _disconnect_all_signals(obj):
+    """
+    Disconnect the awaitables of all signals converted by _convert_all_signals_to_awaitables()
+    """
+    for key, awaitable in obj._signals.items():
         try:
-            signal = getattr(obj, key)
-        except TypeError:
-            continue
-        if type(signal) == QtCore.pyqtBoundSignal:
-            awaitable = Event("{}.{}".format(obj.__class__.__name__, key))
-            #signal.connect(functools.partial(awaitable.post, obj))
-            def sig(awaitable, obj, *args):
-                awaitable.post(QtEvent(obj, *args))
-            signal.connect(functools.partial(sig, awaitable, obj))
-            awaitable.connect = signal.connect # Preserve pyqtBoundSignal.connect()
-            awaitable.emit = signal.emit # Preserve pyqtBoundSignal.emit()
-            setattr(obj, key, awaitable)
-
-class Widget(Primitive):
+            _bound_signal(obj, key).disconnect(awaitable._onemitted)
+        except TypeError: # If the awaitable is already disconnected, ...
+            pass
+
+def _rebind_all_signals(obj):
+    """
+    Replace the awaitables of all signals converted by _convert_all_signals_to_awaitables() with fresh ones and disconnect all other slots
+    """
+    with _current_frame(None):
+        for key in list(obj._signals):
+            try:
+                _bound_signal(obj, key).disconnect()
+            except TypeError: # If nothing is connected to the signal, ...
+                pass
+            _bind_signal(obj, key)
+
+def _add_hook(awaitable, callback):
+    """
+    Call callback with the result of every emission of awaitable, while awaitable processes the emission
+
+    Awaiting frames are resumed on a later tick and only await the awaitable again after that, so they miss emissions posted in the meantime. Hooks don't.
+    """
+    hooks = awaitable.__dict__.get('_hooks')
+    if hooks is None: # If this is the first hook of awaitable, ...
+        hooks = awaitable._hooks = []
+        step = awaitable._step
+        def hooked_step(sender, msg):
+            try:
+                step(sender, msg)
+            except StopIteration as stop: # If awaitable is emitted, ...
+                for hook in hooks[:]:
+                    hook(stop.value)
+                raise
+        awaitable._step = hooked_step
+    hooks.append(callback)
+
+def _remove_hook(awaitable, callback):
+    awaitable._hooks.remove(callback)
+
+class _EventCombinator(Event):
+    """
+    Base class of events derived from a source event (see debounce(), throttle() and batch())
+
+    Emissions of signal awaitables are received through a direct Qt connection and emissions of other awaitables through a hook (see _add_hook()),
+    so that no emission is missed, whether it is sent or posted.
+    Combinators send (rather than post) their own emissions from timer callbacks, so that awaiting frames don't miss any of them.
+    Like all events, combinators are children of the current frame. Pending emissions are dropped when the frame is removed or cancel() is called.
+    """
+    def __init__(self, source, name):
+        super().__init__("{}({})".format(name, source.__name__))
+        self._source = source
+        self._timer = QtCore.QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._ontimeout)
+        if isinstance(source, _SignalEvent):
+            source.connect(self._onsignal)
+        else:
+            _add_hook(source, self._onsource)
+
+    def _onsignal(self, *args):
+        self._onsource(QtEvent(self._source._sender(), *args))
+
+    def cancel(self):
+        """
+        Drop all pending emissions
+        """
+        self._timer.stop()
+
+    def _ondispose(self):
+        self.cancel()
+        if not isinstance(self._source, _SignalEvent):
+            _remove_hook(self._source, self._onsource)
+        else:
+            sender = self._source._sender()
+            if sender is not None and not sip.isdeleted(sender):
+                try:
+                    _bound_signal(sender, self._source._key).disconnect(self._onsignal)
+                except TypeError: # If the signal is already disconnected, ...
+                    pass
+        super()._ondispose()
+
+class _Debounce(_EventCombinator):
+    def __init__(self, source, ms):
+        super().__init__(source, "debounce")
+        self._interval = int(ms)
+        self._value = None
+
+    def _onsource(self, value):
+        self._value = value
+        self._timer.start(self._interval) # Restart the timer on every emission
+
+    def _ontimeout(self):
+        value, self._value = self._value, None
+        self.send(value)
+
+    def cancel(self):
+        super().cancel()
+        self._value = None
+
+class _Throttle(_EventCombinator):
+    def __init__(self, source, hz):
+        super().__init__(source, "throttle")
+        self._interval = max(1, int(1000 / hz))
+        self._value = None
+        self._pending = False
+
+    def _onsource(self, value):
+        self._value, self._pending = value, True
+        if not self._timer.isActive(): # If no emission has been sent during the current interval, ...
+            self._timer.start(0) # Send the emission on the next tick
+        # Otherwise, the latest emission is sent at the end of the current interval
+
+    def _ontimeout(self):
+        if self._pending:
+            value, self._value, self._pending = self._value, None, False
+            self.send(value)
+            self._timer.start(self._interval)
+
+    def cancel(self):
+        super().cancel()
+        self._value, self._pending = None, False
+
+class _Batch(_EventCombinator):
+    def __init__(self, source, max_items, max_ms):
+        super().__init__(source, "batch")
+        self._max_items = max_items
+        self._interval = None if max_ms is None else int(max_ms)
+        self._items = []
+        self._full = False # True, if the timer was started because a batch reached max_items
+
+    def _onsource(self, value):
+        self._items.append(value)
+        if self._max_items is not None and len(self._items) == self._max_items:
+            self._full = True
+            self._timer.start(0) # Send the batch on the next tick
+        elif len(self._items) == 1 and self._interval is not None: # If this is the first emission of a new batch, ...
+            self._timer.start(self._interval)
+
+    def _ontimeout(self):
+        items = self._items
+        max_items = self._max_items or len(items)
+        if self._full: # If a batch reached max_items, ...
+            num_items = len(items) - len(items) % max_items # Only send full batches
+        else: # If max_ms elapsed, ...
+            num_items = len(items) # Send all emissions
+        self._full = False
+        self._items = items[num_items:]
+        if self._items and self._interval is not None: # If emissions remain for the next batch, ...
+            self._timer.start(self._interval)
+        for i in range(0, num_items, max_items): # Split emissions that arrived during the last tick into batches of at most max_items
+            self.send(items[i:i + max_items])
+
+    def cancel(self):
+        super().cancel()
+        self._items = []
+        self._full = False
+
+def debounce(event, ms):
+    """
+    Return an event that is sent the latest emission of event, once event hasn't been emitted for ms milliseconds
+
+    Create the returned event once, outside the loop awaiting it. Otherwise, emissions between iterations are lost.
+    """
+    return _Debounce(event, ms)
+
+def throttle(event, hz):
+    """
+    Return an event that is sent the emissions of event, at most hz times per second
+
+    The first emission is sent on the next tick. Later emissions within the same interval are merged into the latest one, which is sent at the end of the interval.
+    """
+    return _Throttle(event, hz)
+
+def batch(event, max_items=None, max_ms=None):
+    """
+    Return an event that is sent lists of emissions of event
+
+    A batch is sent when it holds max_items emissions or max_ms milliseconds after its first emission, whichever happens first.
+    """
+    if max_items is None and max_ms is None:
+        raise ValueError("batch() needs max_items or max_ms")
+    return _Batch(event, max_items, max_ms)
+
+def latest(event, framefunc):
+    """
+    Start framefunc with each emission of event, removing the frame started with the previous emission, if it is still running
+
+    Use this to cancel in-flight work when a newer value arrives, e.g. latest(debounce(lineedit.textChanged, 300), search).
+    framefunc must be a frame function (decorated with a frame class). Returns the frame that starts the frames of framefunc.
+    """
+    @Frame
+    async def latest():
+        running = None
+        while True:
+            value = await event
+            if running is not None and not running.removed: # If work for an older emission is still in flight, ...
+                running.remove()
+            running = framefunc(value)
+    return latest()
+
+class WidgetMeta(type(QWidget)):
+    """
+    Metaclass of widgets, that handles the `key` keyword argument of widget constructors (see Container.reconcile())
+    and constructs widgets from recycled ones (see Widget.enable_recycling())
+    """
+    def __call__(cls, *args, key=None, **kwargs):
+        if issubclass(cls, Frame): # If the widget is a container, ...
+            return super().__call__(*args, **kwargs) if key is None else super().__call__(*args, key=key, **kwargs)
+        if key is None:
+            return cls._construct(args, kwargs)
+        container = _find_parent(Container)
+        widget = None
+        if container is not None and container._reconciliation is not None:
+            widget = container._reconciliation.reuse(cls, key, args, kwargs)
+        if widget is None:
+            widget = cls._construct(args, kwargs)
+            container = widget._owner
+        widget._key_args = args
+        container._keyed_widgets[(cls, key)] = widget
+        return widget
+
+    def _construct(cls, args, kwargs):
+        pool = cls.__dict__.get('_recycle_pool')
+        while pool: # If recycled widgets are available, ...
+            widget = pool.pop()
+            if sip.isdeleted(widget):
+                continue
+            if widget._recycle(args, kwargs):
+                return widget
+            pool.append(widget) # The arguments can't be applied to a recycled widget
+            break
+        return super().__call__(*args, **kwargs)
+
+class Widget(Primitive, metaclass=WidgetMeta):
+    coalesce_properties = False # If True, writes to properties are buffered and only the last value of each property is applied once per event loop tick
+
     def __init__(self):
-        super().__init__(Container)
-        self.mouse_pressed = Event(f"{self.__class__.__name__}.mouse_pressed")
-        self.mouse_released = Event(f"{self.__class__.__name__}.mouse_released")
-        self.mouse_moved = Event(f"{self.__class__.__name__}.mouse_moved")
-        self.double_clicked = Event(f"{self.__class__.__name__}.double_clicked")
+        _init_primitive(self, Container)
+        self._pending_writes = None # Property name -> (setter, value) of buffered property writes
+
+        # Events of widgets aren't registered with the current frame. They live as long as the widget,
+        # whereas frames would accumulate the events of all widgets ever created within them
+        with _current_frame(None):
+            self.mouse_pressed = Event(f"{self.__class__.__name__}.mouse_pressed")
+            self.mouse_released = Event(f"{self.__class__.__name__}.mouse_released")
+            self.mouse_moved = Event(f"{self.__class__.__name__}.mouse_moved")
+            self.double_clicked = Event(f"{self.__class__.__name__}.double_clicked")
 
     def _ondispose(self):
+        if sip.isdeleted(self): # If the widget was already deleted by Qt (e.g. together with its parent), ...
+            super()._ondispose()
+            return
+        if getattr(self, '_signals', None):
+            _disconnect_all_signals(self)
         self._owner.remove_widget(self)
         self.setParent(None)
-        self.deleteLater()
+        pool = type(self).__dict__.get('_recycle_pool')
+        if pool is not None and len(pool) < type(self)._recycle_pool_size: # If the widget can be recycled, ...
+            self.hide()
+            pool.append(self)
+        else:
+            self.deleteLater()
         super()._ondispose()
 
+    def flush_properties(self):
+        """
+        Apply all buffered property writes immediately
+
+        Called automatically on the next event loop tick after a property of a widget with coalesce_properties == True is written.
+        Only the last value written to each property is applied. Setters called directly (e.g. setValue()) bypass the buffer.
+        """
+        pending_writes, self._pending_writes = self._pending_writes, None
+        if pending_writes and not sip.isdeleted(self):
+            for setter, value in pending_writes.values():
+                setter(self, value)
+
+    @classmethod
+    def enable_recycling(cls, max_size=32):
+        """
+        Keep up to max_size removed widgets of this class (excluding subclasses) in a pool and construct new widgets from them
+
+        Recycled widgets are re-registered with their new container and receive fresh awaitables for all signals (other slots connected to their signals are disconnected).
+        Their text and icon are reset to the constructor arguments and they are re-enabled. Other state is kept.
+        Only constructors without arguments or with a text and optional icon recycle widgets. Other constructors create new widgets.
+        """
+        if '_recycle_pool' not in cls.__dict__:
+            cls._recycle_pool = []
+        cls._recycle_pool_size = max_size
+
+    @classmethod
+    def disable_recycling(cls):
+        cls.drain_pool()
+        if '_recycle_pool' in cls.__dict__:
+            del cls._recycle_pool
+
+    @classmethod
+    def drain_pool(cls):
+        """
+        Delete all recycled widgets of this class
+        """
+        pool = cls.__dict__.get('_recycle_pool', [])
+        for widget in pool:
+            if not sip.isdeleted(widget):
+                widget.deleteLater()
+        pool.clear()
+
+    def _recycle(self, args, kwargs):
+        """
+        Re-initialize a recycled widget with new constructor arguments
+
+        Returns False, if the arguments can't be applied to a recycled widget.
+        """
+        if not args:
+            icon, text = None, ""
+        elif len(args) == 1 and isinstance(args[0], str) and hasattr(self, 'setText'):
+            icon, text = None, args[0]
+        elif len(args) == 2 and isinstance(args[0], QtGui.QIcon) and isinstance(args[1], str) and hasattr(self, 'setIcon'):
+            icon, text = args
+        else:
+            return False
+
+        Widget.__init__(self) # Register with the current container and create fresh mouse events
+        self.setParent(self._owner)
+        _rebind_all_signals(self)
+        if hasattr(self, 'setText'): self.setText(text)
+        if hasattr(self, 'setIcon'): self.setIcon(icon if icon is not None else QtGui.QIcon())
+        self.setEnabled(True)
+        self._show(kwargs)
+        return True
+
+    def _update(self, args):
+        """
+        Update this widget in place to match new constructor arguments
+
+        Returns False, if the widget has to be recreated instead.
+        """
+        old_args = self._key_args
+        try:
+            if args == old_args: return True
+        except ValueError: # If arguments can't be compared (e.g. numpy arrays), ...
+            pass
+        if len(args) == len(old_args) == 1 and isinstance(args[0], str) and isinstance(old_args[0], str) and hasattr(self, 'setText'): # If only the text changed, ...
+            self.setText(args[0])
+            return True
+        return False
+
     def _show(self, kwargs):
-        self.resize(self.sizeHint())
-        self._owner.add_widget(self, **kwargs)
-        self.show()
+        self._owner._add_child(self, kwargs)
 
     def mousePressEvent(self, event):
         qtevent = QtEvent(self, event)
         self.mouse_pressed.send(qtevent)
-        if not getattr(qtevent, "handled", False):
+        if not qtevent.handled:
             super().mousePressEvent(event)
 
     def mouseReleaseEvent(self, event):
         qtevent = QtEvent(self, event)
         self.mouse_released.send(qtevent)
-        if not getattr(qtevent, "handled", False):
+        if not qtevent.handled:
             super().mouseReleaseEvent(event)
 
     def mouseMoveEvent(self, event):
         qtevent = QtEvent(self, event)
         self.mouse_moved.send(qtevent)
-        if not getattr(qtevent, "handled", False):
+        if not qtevent.handled:
             super().mouseMoveEvent(event)
 
     def mouseDoubleClickEvent(self, event):
         qtevent = QtEvent(self, event)
         self.double_clicked.send(qtevent)
-        if not getattr(qtevent, "handled", False):
+        if not qtevent.handled:
             super().mouseDoubleClickEvent(event)
 
 class PushButton(Widget, QtWidgets.QPushButton):
@@ -514,7 +1503,128 @@ class Label(Widget, QtWidgets.QLabel):
         self._show(kwargs)
 _create_properties(QtWidgets.QLabel, Label)
 
-class PlainTextEdit(Widget, QtWidgets.QPlainTextEdit):
+class _LogView(object):
+    """
+    The line buffer of a PlainTextEdit or TextBrowser in log view mode (see enable_log_view())
+    """
+    def __init__(self, widget, max_lines):
+        self.widget = widget
+        self.max_lines = max_lines
+        self.lines = collections.deque(maxlen=max_lines) # Ring buffer of all logged lines
+        self.filter = None
+        self.matches = None # Ring buffer of logged lines matching self.filter
+        self.pending = [] # Displayed lines that haven't been appended to the document yet
+        self.scheduled = False
+
+    def _match(self, line):
+        return self.filter in line.lower()
+
+    def log(self, text):
+        lines = text.split('\n')[-self.max_lines:]
+        num_evicted = len(self.lines) + len(lines) - self.max_lines
+        if self.filter and num_evicted > 0: # If the ring buffer is about to drop its oldest lines, ...
+            # Drop matches of evicted lines as well, so that the filter only covers buffered lines
+            for line in itertools.islice(self.lines, num_evicted):
+                if self._match(line):
+                    self.matches.popleft()
+        self.lines.extend(lines)
+        if self.filter:
+            lines = [line for line in lines if self._match(line)]
+            self.matches.extend(lines)
+        self.pending.extend(lines)
+        if not self.scheduled: # If this is the first line logged during the current tick, ...
+            self.scheduled = True
+            QtCore.QTimer.singleShot(0, self.flush)
+
+    def flush(self):
+        """
+        Append all pending lines to the document in a single edit
+        """
+        self.scheduled = False
+        pending, self.pending = self.pending[-self.max_lines:], []
+        if not pending or sip.isdeleted(self.widget): return
+        scrollbar = self.widget.verticalScrollBar
+        pinned = scrollbar.value() >= scrollbar.maximum()
+        document = self.widget.document
+        cursor = QtGui.QTextCursor(document)
+        cursor.movePosition(QtGui.QTextCursor.End)
+        cursor.beginEditBlock()
+        if not document.isEmpty():
+            cursor.insertBlock()
+        cursor.insertText('\n'.join(pending)) # Line breaks are inserted as blocks. Blocks beyond the maximum block count are removed from the top
+        cursor.endEditBlock()
+        if pinned: # If the view was scrolled to the bottom, ...
+            scrollbar.setValue(scrollbar.maximum()) # Follow new lines
+        # Otherwise, keep showing the lines the user scrolled to
+
+    def set_filter(self, text):
+        text = text.lower() if text else None
+        if text == self.filter: return
+        if not text:
+            self.matches = None
+        elif self.filter and self.filter in text: # If the new filter narrows the previous filter, ...
+            self.matches = collections.deque(filter(lambda line: text in line.lower(), self.matches), maxlen=self.max_lines) # Only lines that matched the previous filter can match
+        else:
+            self.matches = collections.deque(filter(lambda line: text in line.lower(), self.lines), maxlen=self.max_lines)
+        self.filter = text
+        self.render()
+
+    def clear(self):
+        self.lines.clear()
+        if self.matches is not None:
+            self.matches.clear()
+        self.render()
+
+    def render(self):
+        """
+        Replace the document with all buffered lines matching the filter
+        """
+        self.pending = []
+        self.widget.setPlainText('\n'.join(self.matches if self.filter else self.lines))
+        scrollbar = self.widget.verticalScrollBar
+        scrollbar.setValue(scrollbar.maximum())
+
+class _LogViewWidget(object):
+    """
+    Log view mode of text widgets
+    """
+    _log = None
+
+    def enable_log_view(self, max_lines=10000):
+        """
+        Turn this widget into a read-only log console
+
+        Text added with log() is kept in a ring buffer of max_lines lines and appended to the document in a single edit once per event loop tick.
+        The view only follows new lines while it is scrolled to the bottom. set_log_filter() limits the view to matching lines.
+        """
+        self.setReadOnly(True)
+        self.document.setMaximumBlockCount(max_lines)
+        self._log = _LogView(self, max_lines)
+        self._log.render()
+
+    def log(self, text):
+        """
+        Append one or more lines of text to the log
+        """
+        if self._log is None:
+            raise Exception("log() needs log view mode to be enabled (see enable_log_view())")
+        self._log.log(text)
+
+    def set_log_filter(self, text):
+        """
+        Only show logged lines containing text (case-insensitive), or all lines, if text is empty or None
+
+        Narrowing the filter (e.g. while typing) only searches the lines that matched the previous filter.
+        """
+        if self._log is None:
+            raise Exception("set_log_filter() needs log view mode to be enabled (see enable_log_view())")
+        self._log.set_filter(text)
+
+    def clear_log(self):
+        if self._log is not None:
+            self._log.clear()
+
+class PlainTextEdit(Widget, _LogViewWidget, QtWidgets.QPlainTextEdit):
     @dispatch(str)
     def __init__(self, text, **kwargs):
         super().__init__()
@@ -559,7 +1669,7 @@ class TextEdit(Widget, QtWidgets.QTextEdit):
         self._show(kwargs)
 _create_properties(QtWidgets.QTextEdit, TextEdit)
 
-class TextBrowser(Widget, QtWidgets.QTextBrowser):
+class TextBrowser(Widget, _LogViewWidget, QtWidgets.QTextBrowser):
     @dispatch()
     def __init__(self, **kwargs):
         super().__init__()
@@ -582,6 +1692,7 @@ class LCDNumber(Widget, QtWidgets.QLCDNumber):
         _convert_all_signals_to_awaitables(self)
         self._show(kwargs)
 _create_properties(QtWidgets.QLCDNumber, LCDNumber)
+LCDNumber.value = _property(LCDNumber, 'value', QtWidgets.QLCDNumber.value, QtWidgets.QLCDNumber.display) # QLCDNumber's setter is called display()
 
 class ProgressBar(Widget, QtWidgets.QProgressBar):
     @dispatch()
@@ -638,6 +1749,8 @@ class ListView(Widget, QtWidgets.QListView):
         QtWidgets.QListView.__init__(self, text, self._owner)
         _convert_all_signals_to_awaitables(self)
         self.current_changed = Event("ListView.current_changed")
+        self._thumbnails = None
+        self._thumbnail_model = None
         self._show(kwargs)
     @dispatch()
     def __init__(self, **kwargs):
@@ -645,12 +1758,108 @@ class ListView(Widget, QtWidgets.QListView):
         QtWidgets.QListView.__init__(self, self._owner)
         _convert_all_signals_to_awaitables(self)
         self.current_changed = Event("ListView.current_changed")
+        self._thumbnails = None
+        self._thumbnail_model = None
         self._show(kwargs)
     def currentChanged(self, current, previous):
         self.current_changed.send(QtEvent(self, current, previous))
+
+    def set_thumbnails(self, thumbnails, path_role=Qt.UserRole):
+        """
+        Show thumbnails from a ThumbnailCache as icons of items without an icon
+
+        The source image path of each item is read from the data role path_role. Thumbnails are only requested for rows that are scrolled into view.
+        Call this method after setting the model and again after replacing the model.
+        """
+        if self._thumbnails is None: # If thumbnails weren't shown before, ...
+            self._thumbnails_scheduled = False
+            self.verticalScrollBar().valueChanged.connect(self._schedule_thumbnails)
+            self.horizontalScrollBar().valueChanged.connect(self._schedule_thumbnails)
+        self._thumbnails = thumbnails
+        self._thumbnail_path_role = path_role
+        model = self.model()
+        if model is not self._thumbnail_model: # If the model changed since the last call, ...
+            if self._thumbnail_model is not None and not sip.isdeleted(self._thumbnail_model):
+                self._thumbnail_model.rowsInserted.disconnect(self._schedule_thumbnails)
+                self._thumbnail_model.modelReset.disconnect(self._schedule_thumbnails)
+                self._thumbnail_model.layoutChanged.disconnect(self._schedule_thumbnails)
+            self._thumbnail_model = model
+            if model is not None:
+                model.rowsInserted.connect(self._schedule_thumbnails)
+                model.modelReset.connect(self._schedule_thumbnails)
+                model.layoutChanged.connect(self._schedule_thumbnails)
+        self._schedule_thumbnails()
+
+    def resizeEvent(self, event):
+        QtWidgets.QListView.resizeEvent(self, event)
+        if self._thumbnails is not None:
+            self._schedule_thumbnails()
+
+    def _schedule_thumbnails(self, *args):
+        # Coalesce bursts of scroll, resize and model events into a single update
+        if not self._thumbnails_scheduled:
+            self._thumbnails_scheduled = True
+            QtCore.QTimer.singleShot(0, self._update_thumbnails)
+
+    def _update_thumbnails(self):
+        self._thumbnails_scheduled = False
+        model = self.model()
+        if model is None or sip.isdeleted(self):
+            return
+        viewport_rect = self.viewport().rect()
+        for row in self._visible_rows(model, viewport_rect):
+            index = model.index(row, self.modelColumn())
+            if index.data(Qt.DecorationRole) is not None or not self.visualRect(index).intersects(viewport_rect): # If the item has an icon or isn't visible, ...
+                continue
+            path = index.data(self._thumbnail_path_role)
+            if path:
+                self._thumbnails.request(path, functools.partial(self._onthumbnail, QtCore.QPersistentModelIndex(index)))
+
+    def _visible_rows(self, model, viewport_rect):
+        """
+        Return the range of rows whose items may intersect viewport_rect, without visiting the rows outside of it
+
+        Rows are laid out in order along the flow of the view, so the visible rows follow the first item intersecting the top left corner of the viewport.
+        """
+        column = self.modelColumn()
+        row_count = model.rowCount()
+        scrolls_vertically = (self.flow() == QtWidgets.QListView.TopToBottom) != self.isWrapping()
+        def before_viewport(row):
+            rect = self.visualRect(model.index(row, column))
+            return rect.bottom() < viewport_rect.top() if scrolls_vertically else rect.right() < viewport_rect.left()
+        def after_viewport(row):
+            rect = self.visualRect(model.index(row, column))
+            return rect.top() > viewport_rect.bottom() if scrolls_vertically else rect.left() > viewport_rect.right()
+
+        index = self.indexAt(viewport_rect.topLeft())
+        if index.isValid():
+            first = index.row()
+        else: # If the corner lies between items, binary search for the first row that isn't before the viewport
+            first, end = 0, row_count
+            while first < end:
+                middle = (first + end) // 2
+                if before_viewport(middle):
+                    first = middle + 1
+                else:
+                    end = middle
+        while first > 0 and self.visualRect(model.index(first - 1, column)).intersects(viewport_rect): # Include earlier items of a partially visible line
+            first -= 1
+
+        # Stop at the first item beyond the viewport in the scroll direction
+        stop = first
+        while stop < row_count and not after_viewport(stop):
+            stop += 1
+        return range(first, stop)
+
+    def _onthumbnail(self, index, pixmap):
+        if not pixmap.isNull() and index.isValid(): # If the thumbnail exists and the item still exists, ...
+            index.model().setData(QtCore.QModelIndex(index), QtGui.QIcon(pixmap), Qt.DecorationRole)
 _create_properties(QtWidgets.QListView, Label)
 
-class ListWidget(Container, Widget, QtWidgets.QListWidget):
+class _ContainerWidgetMeta(QtFrame, WidgetMeta):
+    pass
+
+class ListWidget(Container, Widget, QtWidgets.QListWidget, metaclass=_ContainerWidgetMeta):
     @dispatch()
     def __init__(self, **kwargs):
         Widget.__init__(self)
@@ -704,15 +1913,104 @@ class ChartView(Widget, QtChart.QChartView):
         super().__init__()
         QtChart.QChartView.__init__(self, chart, self._owner)
         _convert_all_signals_to_awaitables(self)
+        self._series_data = weakref.WeakKeyDictionary()
+        self._autorange_pending = False
         self._show(kwargs)
     @dispatch()
     def __init__(self, **kwargs):
         super().__init__()
         QtChart.QChartView.__init__(self, self._owner)
         _convert_all_signals_to_awaitables(self)
+        self._series_data = weakref.WeakKeyDictionary()
+        self._autorange_pending = False
         self._show(kwargs)
+
+    def replace_series(self, series, points, autorange=True):
+        """
+        Replace all points of a QXYSeries (e.g. QLineSeries or QScatterSeries) with an (N, 2) array in a single call
+        """
+        points = np.array(points, np.float64).reshape(-1, 2)
+        self._series_data[series] = points
+        series.replace(_polygon_from_arrays(points[:, 0], points[:, 1]))
+        if autorange:
+            self._schedule_autorange()
+
+    def extend_series(self, series, points, max_points=None, autorange=True):
+        """
+        Append an (N, 2) array of points to a QXYSeries in a single call
+
+        If max_points is given, only the most recent max_points points are kept.
+        """
+        data = self._series_data.get(series)
+        if data is None: # If series wasn't filled through replace_series() or extend_series(), ...
+            data = np.array([(point.x(), point.y()) for point in series.pointsVector()], np.float64).reshape(-1, 2)
+        data = np.concatenate((data, np.asarray(points, np.float64).reshape(-1, 2)))
+        if max_points is not None:
+            data = data[-max_points:]
+        self.replace_series(series, data, autorange)
+
+    def _schedule_autorange(self):
+        # Coalesce axis range updates of all series into one update per event loop iteration
+        if not self._autorange_pending:
+            self._autorange_pending = True
+            QtCore.QTimer.singleShot(0, self._autorange)
+
+    def _autorange(self):
+        self._autorange_pending = False
+        ranges = {}
+        for series, data in self._series_data.items():
+            if not len(data): continue
+            for axis in series.attachedAxes():
+                if not isinstance(axis, (QtChart.QValueAxis, QtChart.QLogValueAxis)): continue
+                values = data[:, 0 if axis.orientation() == Qt.Horizontal else 1]
+                vmin, vmax = values.min(), values.max()
+                if axis in ranges:
+                    vmin, vmax = min(vmin, ranges[axis][0]), max(vmax, ranges[axis][1])
+                ranges[axis] = (vmin, vmax)
+        for axis, (vmin, vmax) in ranges.items():
+            axis.setRange(float(vmin), float(vmax))
 _create_properties(QtChart.QChartView, Label)
 
+class PlotWidget(Canvas):
+    """
+    A canvas for plotting streaming data series
+
+    Data is added through PlotSeries shapes defined inside the PlotWidget. If xrange or yrange is None, the respective range is fitted to the data of all series.
+    """
+    def __init__(self, size=None, xrange=None, yrange=None, **kwargs):
+        super().__init__(size, **kwargs)
+        self.xrange = xrange
+        self.yrange = yrange
+        self._paint_range = None # View range of the current paint event
+
+    def paintEvent(self, event):
+        self._paint_range = self.view_range() # Computed once per paint event and shared by all series
+        try:
+            super().paintEvent(event)
+        finally:
+            self._paint_range = None
+
+    def series(self):
+        return [shape for shape in self.shapes if isinstance(shape, PlotSeries)]
+
+    def view_range(self):
+        """
+        Return the visible data range as a tuple (xmin, xmax, ymin, ymax)
+        """
+        xrange, yrange = self.xrange, self.yrange
+        if xrange is None or yrange is None:
+            xmin = ymin = np.inf
+            xmax = ymax = -np.inf
+            for series in self.series():
+                series_range = series._buffer.range()
+                if series_range is not None:
+                    xmin, xmax = min(xmin, series_range[0]), max(xmax, series_range[1])
+                    if not np.isnan(series_range[2]): # If the series isn't all NaN, ...
+                        ymin, ymax = min(ymin, series_range[2]), max(ymax, series_range[3])
+            if xrange is None: xrange = (xmin, xmax) if xmin < xmax else (0.0, 1.0)
+            if yrange is None: yrange = (ymin, ymax) if ymin < ymax else ((ymin - 1.0, ymin + 1.0) if ymin == ymax else (0.0, 1.0))
+        return (float(xrange[0]), float(xrange[1]), float(yrange[0]), float(yrange[1]))
+
 class StandardItemModel(PFrame, QtGui.QStandardItemModel, metaclass=QtFrame):
     @dispatch(int, int)
     def __init__(self, rows, columns):
@@ -723,28 +2021,47 @@ class StandardItemModel(PFrame, QtGui.QStandardItemModel, metaclass=QtFrame):
         QtGui.QStandardItemModel.__init__(self)
         Frame.__init__(self)
 
+def _load_icon(item, path, size, placeholder):
+    """
+    Show placeholder as the icon of item, until the image at path has been decoded in the background
+    """
+    if placeholder is not None:
+        item.setIcon(QtGui.QIcon(placeholder))
+    def onloaded(image):
+        if not image.isNull() and not sip.isdeleted(item): # If decoding succeeded and the item still exists, ...
+            item.setIcon(QtGui.QIcon(QPixmap.fromImage(image)))
+    return load_image(path, size, callback=onloaded)
+
 class StandardItem(Primitive, QtGui.QStandardItem):
     @dispatch(str)
     def __init__(self, text):
         QtGui.QStandardItem.__init__(self, text)
-        Primitive.__init__(self, StandardItemModel)
+        _init_primitive(self, StandardItemModel)
         self._owner.appendRow(self)
     @dispatch(QtGui.QIcon, str)
     def __init__(self, icon, text):
         QtGui.QStandardItem.__init__(self, icon, text)
-        Primitive.__init__(self, StandardItemModel)
+        _init_primitive(self, StandardItemModel)
         self._owner.appendRow(self)
     @dispatch(int)
     def __init__(self, rows, columns=1):
         QtGui.QStandardItem.__init__(self, rows, columns)
-        Primitive.__init__(self, StandardItemModel)
+        _init_primitive(self, StandardItemModel)
         self._owner.appendRow(self)
     @dispatch()
     def __init__(self):
         QtGui.QStandardItem.__init__(self)
-        Primitive.__init__(self, StandardItemModel)
+        _init_primitive(self, StandardItemModel)
         self._owner.appendRow(self)
 
+    def load_icon(self, path, size=None, placeholder=None):
+        """
+        Load the icon from the image file at path in the background
+
+        Returns an event that is posted with the decoded QImage. See ImageLoader.load().
+        """
+        return _load_icon(self, path, size, placeholder)
+
 class ListWidgetItem(Widget, QtWidgets.QListWidgetItem):
     @dispatch(str)
     def __init__(self, text, **kwargs):
@@ -761,6 +2078,14 @@ class ListWidgetItem(Widget, QtWidgets.QListWidgetItem):
         super().__init__()
         QtWidgets.QListWidgetItem.__init__(self, self._owner)
         #_convert_all_signals_to_awaitables(self) #TODO
+
+    def load_icon(self, path, size=None, placeholder=None):
+        """
+        Load the icon from the image file at path in the background
+
+        Returns an event that is posted with the decoded QImage. See ImageLoader.load().
+        """
+        return _load_icon(self, path, size, placeholder)
 _create_properties(QtWidgets.QListWidgetItem, ListWidgetItem)
 
 class DialogButtonBox(Widget, QtWidgets.QDialogButtonBox):
@@ -785,7 +2110,7 @@ class DialogButtonBox(Widget, QtWidgets.QDialogButtonBox):
     def _init(self, *args, **kwargs):
         super().__init__()
         QtWidgets.QDialogButtonBox.__init__(self, *args, self._owner)
-        dialog = find_parent(Dialog)
+        dialog = _find_parent(Dialog)
         if dialog is None:
             raise Exception("DialogButtonBox needs to be defined inside a Dialog")
         self.accepted.connect(dialog.accept)
@@ -798,35 +2123,338 @@ _create_properties(QtWidgets.QDialogButtonBox, DialogButtonBox)
 # Shapes
 # ------------------------------------------------------------------------------
 
-class Shape(Primitive, metaclass=abc.ABCMeta):
+class Shape(object, metaclass=abc.ABCMeta):
+    """
+    Base class of all shapes drawn by a CanvasLayer
+
+    Canvases can hold hundreds of thousands of shapes, so shapes are slotted. Since any class derived from Primitive carries an instance dictionary,
+    shapes implement the Primitive interface (registration with the owning layer and remove()) themselves instead of deriving from Primitive.
+    Derived shape classes without __slots__ get an instance dictionary as usual.
+    """
+    __slots__ = ('_removed', '_owner', '_canvas')
+
     def __init__(self):
-        super().__init__(CanvasLayer)
+        _init_primitive(self, CanvasLayer)
 
         # Find parent frame of class Canvas
-        self._canvas = find_parent(Canvas)
+        self._canvas = _find_parent(Canvas)
 
         self._owner.shapes.append(self)
 
+    def remove(self):
+        """
+        Remove this shape from its layer
+
+        Returns False, if the shape had already been removed.
+        """
+        if self._removed:
+            return False
+        self._removed = True
+        self._owner._primitives.remove(self)
+        self._ondispose()
+        return True
+
     def _ondispose(self):
         self._owner.shapes.remove(self)
 
+    def bounds(self):
+        """
+        Return the bounding rectangle of this shape in layer coordinates or None if the shape should never be culled
+        """
+        return None
+
     @abc.abstractmethod
     def draw(self, painter):
         raise NotImplementedError
 
+def _polygon_from_arrays(x, y):
+    """
+    Create a QPolygonF from coordinate arrays with a single copy into the polygon's memory
+    """
+    polygon = QtGui.QPolygonF()
+    polygon.fill(QPointF(), len(x))
+    buffer = polygon.data()
+    buffer.setsize(16 * len(x)) # 2 doubles per point
+    points = np.frombuffer(buffer, np.float64).reshape(-1, 2)
+    points[:, 0] = x
+    points[:, 1] = y
+    return polygon
+
+def _decimate_minmax(px, ymin, ymax):
+    """
+    Reduce consecutive points sharing the same pixel column to the minimum and maximum value of that column
+
+    px are monotonically increasing x-coordinates in pixels and ymin, ymax the value range of each point. Returns the decimated pixel x-coordinates and values.
+    """
+    columns = np.floor(px)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(columns)) + 1))
+    decimated_y = np.empty(2 * len(starts))
+    decimated_y[0::2] = np.fmin.reduceat(ymin, starts)
+    decimated_y[1::2] = np.fmax.reduceat(ymax, starts)
+    return np.repeat(columns[starts] + 0.5, 2), decimated_y
+
+class _RingBuffer(object):
+    """
+    A fixed-capacity buffer of (x, y) samples that overwrites the oldest samples when full
+
+    The buffer keeps a min/max pyramid of the y-values: Level l holds the minimum and maximum of each aligned block of FACTOR**(l + 1) buffer slots.
+    Appending samples only recomputes the blocks they overlap, so that the range of the data and min/max summaries of any part of it
+    are known without scanning all samples. The coarsest level consists of a single block spanning the whole buffer.
+    """
+    FACTOR = 4
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._x = np.empty(capacity)
+        self._y = np.empty(capacity)
+        self._end = 0 # Total number of samples ever appended
+        self._min = []
+        self._max = []
+        size = 1
+        while size < capacity or not self._min:
+            size *= self.FACTOR
+            self._min.append(np.empty(-(-capacity // size)))
+            self._max.append(np.empty(-(-capacity // size)))
+
+    def __len__(self):
+        return min(self._end, self.capacity)
+
+    def append(self, x, y):
+        n = len(y)
+        if n > self.capacity: # If more samples are appended than fit into the buffer, ...
+            self._end += n - self.capacity # Skip samples that would be overwritten anyway
+            x, y, n = x[-self.capacity:], y[-self.capacity:], self.capacity
+        start = self._end % self.capacity
+        first = min(n, self.capacity - start)
+        self._x[start:start + first] = x[:first]
+        self._y[start:start + first] = y[:first]
+        self._x[:n - first] = x[first:]
+        self._y[:n - first] = y[first:]
+        self._end += n
+        self._update_levels(start, start + first)
+        self._update_levels(0, n - first)
+
+    def _update_levels(self, start, stop):
+        """
+        Recompute all blocks of the min/max pyramid overlapping the buffer slots [start, stop)
+        """
+        if start >= stop: return
+        ymin = ymax = self._y
+        valid = len(self) # Number of valid entries of the previous level
+        for level_min, level_max in zip(self._min, self._max):
+            # fmin/fmax ignore NaNs (gaps in the data)
+            first_block, stop_block = start // self.FACTOR, -(-stop // self.FACTOR)
+            end = min(stop_block * self.FACTOR, valid)
+            groups = np.arange(first_block * self.FACTOR, end, self.FACTOR)
+            level_min[first_block:stop_block] = np.fmin.reduceat(ymin[:end], groups)
+            level_max[first_block:stop_block] = np.fmax.reduceat(ymax[:end], groups)
+            ymin, ymax = level_min, level_max
+            start, stop, valid = first_block, stop_block, -(-valid // self.FACTOR)
+
+    def _segments(self, start, stop):
+        """
+        Return the ranges of buffer slots holding the samples [start, stop), counted from the oldest sample, as a list of (begin, end) tuples in order
+        """
+        oldest = self._end % self.capacity if self._end > self.capacity else 0
+        begin, end = oldest + start, oldest + stop
+        if end <= self.capacity:
+            return [(begin, end)]
+        if begin >= self.capacity:
+            return [(begin - self.capacity, end - self.capacity)]
+        return [(begin, self.capacity), (0, end - self.capacity)]
+
+    def range(self):
+        """
+        Return the range of the buffered data as a tuple (xmin, xmax, ymin, ymax) or None, if the buffer is empty
+        """
+        n = len(self)
+        if n == 0:
+            return None
+        (first, _), = self._segments(0, 1)
+        (last, _), = self._segments(n - 1, n)
+        return (self._x[first], self._x[last], self._min[-1][0], self._max[-1][0])
+
+    def searchsorted(self, values):
+        """
+        Return the indices, counted from the oldest sample, where the given x-values would be inserted to keep the samples ordered
+        """
+        # Since x-values are increasing, the insertion index is the number of smaller x-values in all segments
+        return sum(np.searchsorted(self._x[begin:end], values) for begin, end in self._segments(0, len(self)))
+
+    def minmax(self, start, stop, level):
+        """
+        Return the samples [start, stop), counted from the oldest sample, summarized by the given level of the min/max pyramid
+
+        Returns the arrays (x, ymin, ymax). Each aligned block of the level is reduced to the x-value of its first sample and its y-range.
+        Samples that don't fill a whole block are returned as is. Level -1 returns all samples.
+        """
+        size = self.FACTOR ** (level + 1)
+        xs, ymins, ymaxs = [], [], []
+        def add_samples(begin, end):
+            xs.append(self._x[begin:end])
+            ymins.append(self._y[begin:end])
+            ymaxs.append(self._y[begin:end])
+        for begin, end in self._segments(start, stop):
+            first_block, stop_block = -(-begin // size), end // size
+            if level < 0 or first_block >= stop_block: # If the segment doesn't contain a whole block, ...
+                add_samples(begin, end)
+                continue
+            add_samples(begin, first_block * size)
+            xs.append(self._x[first_block * size:stop_block * size:size])
+            ymins.append(self._min[level][first_block:stop_block])
+            ymaxs.append(self._max[level][first_block:stop_block])
+            add_samples(stop_block * size, end)
+        if len(xs) == 1:
+            return xs[0], ymins[0], ymaxs[0]
+        return np.concatenate(xs), np.concatenate(ymins), np.concatenate(ymaxs)
+
+    def clear(self):
+        self._end = 0
+
+    def data(self):
+        segments = self._segments(0, len(self))
+        if len(segments) == 1:
+            (begin, end), = segments
+            return self._x[begin:end], self._y[begin:end]
+        return np.concatenate([self._x[begin:end] for begin, end in segments]), np.concatenate([self._y[begin:end] for begin, end in segments])
+
+class _PointBuffer(object):
+    """
+    A growable array of 2D points with amortized constant-time appends
+    """
+    def __init__(self):
+        self._data = np.empty((0, 2))
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def view(self):
+        return self._data[:self._size]
+
+    def truncate(self, size):
+        self._size = min(self._size, size)
+
+    def extend(self, points):
+        end = self._size + len(points)
+        if end > len(self._data):
+            data = np.empty((max(end, 2 * len(self._data)), 2))
+            data[:self._size] = self._data[:self._size]
+            self._data = data
+        self._data[self._size:end] = points
+        self._size = end
+
+def _reduce_minmax(points, group):
+    """
+    Replace each group of consecutive points with the points of minimum and maximum y-value (in their original order)
+    """
+    n = len(points)
+    num_groups = -(-n // group)
+    # Pad the last (partial) group with values that are never selected
+    ymin = np.full(num_groups * group, np.inf)
+    ymax = np.full(num_groups * group, -np.inf)
+    ymin[:n] = ymax[:n] = points[:, 1]
+    base = np.arange(num_groups) * group
+    imin = base + np.argmin(ymin.reshape(num_groups, group), axis=1)
+    imax = base + np.argmax(ymax.reshape(num_groups, group), axis=1)
+    reduced = np.empty((2 * num_groups, 2))
+    reduced[0::2] = points[np.minimum(imin, imax)]
+    reduced[1::2] = points[np.maximum(imin, imax)]
+    return reduced
+
+class _LodPyramid(object):
+    """
+    Multi-resolution min/max representation of a polyline
+
+    Level 0 holds all points. Each point pair of level l summarizes FACTOR**l consecutive points of level 0.
+    Appending points only recomputes the trailing blocks of each level.
+    Since every level keeps its points in their original order, the levels of a polyline with increasing x-coordinates can be clipped by binary search.
+    """
+    FACTOR = 4
+
+    def __init__(self, points):
+        self.levels = [_PointBuffer()]
+        self.min = np.full(2, np.inf)
+        self.max = np.full(2, -np.inf)
+        self.increasing = True # True, if the x-coordinates of all points are monotonically increasing
+        self.extend(points)
+
+    @property
+    def points(self):
+        return self.levels[0].view()
+
+    def extend(self, points):
+        points = np.asarray(points, np.float64).reshape(-1, 2)
+        if not len(points): return
+        self.min = np.minimum(self.min, points.min(axis=0))
+        self.max = np.maximum(self.max, points.max(axis=0))
+        if self.increasing:
+            previous = self.levels[0].view()[-1:, 0]
+            self.increasing = bool(np.all(np.diff(np.concatenate((previous, points[:, 0]))) >= 0))
+
+        changed = len(self.levels[0]) # Index of the first changed point of the previous level
+        self.levels[0].extend(points)
+        for l in range(1, len(self.levels)):
+            group = self.FACTOR if l == 1 else 2 * self.FACTOR
+            first_block = changed // group
+            self.levels[l].truncate(2 * first_block)
+            self.levels[l].extend(_reduce_minmax(self.levels[l - 1].view()[first_block * group:], group))
+            changed = 2 * first_block
+
+        # Add coarser levels until the coarsest level is small enough to be drawn at any scale
+        while len(self.levels[-1]) > 4 * self.FACTOR:
+            level = _PointBuffer()
+            level.extend(_reduce_minmax(self.levels[-1].view(), self.FACTOR if len(self.levels) == 1 else 2 * self.FACTOR))
+            self.levels.append(level)
+
+    def select(self, pixels, xmin=-np.inf, xmax=np.inf):
+        """
+        Return the points of the coarsest level, whose blocks don't span more than one of the given number of pixels
+
+        If the x-coordinates are increasing, only the points within [xmin, xmax] (plus one point on either side) are considered and returned.
+        In this case, pixels is the number of pixels spanned by [xmin, xmax].
+        """
+        clip = self.increasing and (xmin > self.min[0] or xmax < self.max[0])
+        start, stop = self._clip(self.levels[0].view(), xmin, xmax) if clip else (0, len(self.levels[0]))
+        points_per_pixel = (stop - start) / max(1.0, pixels)
+        level = int(math.log(points_per_pixel, self.FACTOR)) if points_per_pixel > 1.0 else 0
+        points = self.levels[min(level, len(self.levels) - 1)].view()
+        if clip:
+            start, stop = self._clip(points, xmin, xmax)
+            points = points[start:stop]
+        return points
+
+    @staticmethod
+    def _clip(points, xmin, xmax):
+        # Binary search the x-coordinates in place, since numpy.searchsorted() would copy the strided column
+        x = points[:, 0]
+        return max(0, bisect.bisect_left(x, xmin) - 1), min(len(x), bisect.bisect_right(x, xmax) + 1)
+
+def _pad(rect, pen):
+    # Grow rect by the width of pen, so that culling never clips outlines (or zero-area shapes, like straight lines)
+    margin = max(1.0, pen.widthF()) if pen is not None else 1.0
+    return rect.adjusted(-margin, -margin, margin, margin)
+
 class Line(Shape):
+    __slots__ = ('v0', 'v1', 'pen')
+
     def __init__(self, v0, v1, pen=None):
         super().__init__()
         self.v0 = v0
         self.v1 = v1
         self.pen = pen
 
+    def bounds(self):
+        return _pad(QRectF(QPointF(*self.v0), QPointF(*self.v1)).normalized(), self.pen)
+
     def draw(self, painter):
         if self.pen is not None: painter.setPen(self.pen)
         painter.setWorldTransform(self._owner.transform)
         painter.drawLine(self.v0.x, self.v0.y, self.v1.x, self.v1.y)
 
 class Lines(Shape):
+    __slots__ = ('points', 'pen')
+
     def __init__(self, points, pen=None):
         super().__init__()
         self.points = points
@@ -838,17 +2466,67 @@ class Lines(Shape):
         painter.drawLines(*(QPointF(*p) for p in self.points))
 
 class Polyline(Shape):
-    def __init__(self, points, pen=None):
+    """
+    A connected sequence of line segments
+
+    If lod is True, the points are stored in a min/max level-of-detail pyramid and drawn at the coarsest level that preserves the shape at the current scale.
+    LOD polylines are drawn in device coordinates, i.e. their pen width isn't affected by the layer's scale.
+    """
+    __slots__ = ('_pyramid', '_points', 'pen')
+
+    def __init__(self, points, pen=None, lod=False):
         super().__init__()
-        self.points = points
+        self._pyramid = _LodPyramid(points) if lod else None
+        self._points = None if lod else points
         self.pen = pen
 
+    @property
+    def points(self):
+        return self._points if self._pyramid is None else self._pyramid.points
+    @points.setter
+    def points(self, value):
+        if self._pyramid is None:
+            self._points = value
+        else:
+            self._pyramid = _LodPyramid(value)
+
+    def append(self, points):
+        if self._pyramid is not None:
+            self._pyramid.extend(points)
+        elif isinstance(self._points, np.ndarray):
+            self._points = np.concatenate((self._points, np.reshape(points, (-1, self._points.shape[-1]))))
+        else:
+            self._points.extend(points)
+        self._owner._canvas.update()
+
+    def bounds(self):
+        if self._pyramid is None or not len(self._pyramid.points):
+            return None
+        return _pad(QRectF(QPointF(*self._pyramid.min), QPointF(*self._pyramid.max)), self.pen)
+
     def draw(self, painter):
         if self.pen is not None: painter.setPen(self.pen)
         painter.setWorldTransform(self._owner.transform)
-        painter.drawPolyline(*(QPointF(*p) for p in self.points))
+        if self._pyramid is None:
+            painter.drawPolyline(*(QPointF(*p) for p in self._points))
+        elif len(self._pyramid.points):
+            t = self._owner.transform
+            pyramid = self._pyramid
+            xmin, xmax = pyramid.min[0], pyramid.max[0]
+            if pyramid.increasing: # If the points can be clipped, choose the level from the visible part only
+                visible = self._owner._visible_rect(painter)
+                xmin, xmax = max(xmin, visible.left()), min(xmax, visible.right())
+                if xmin > xmax:
+                    return
+            extent = t.mapRect(QRectF(QPointF(xmin, pyramid.min[1]), QPointF(xmax, pyramid.max[1])))
+            x, y = pyramid.select(max(extent.width(), extent.height()), xmin, xmax).T
+            # Map points to device coordinates, so that the pen isn't stroked under a (possibly non-uniform) world scale
+            painter.setWorldTransform(QTransform())
+            painter.drawPolyline(_polygon_from_arrays(t.m11() * x + t.m21() * y + t.dx(), t.m12() * x + t.m22() * y + t.dy()))
 
 class Rect(Shape):
+    __slots__ = ('pos', 'size', 'pen', 'brush')
+
     def __init__(self, pos, size, pen=None, brush=None):
         super().__init__()
         self.pos = pos
@@ -856,6 +2534,9 @@ class Rect(Shape):
         self.pen = pen
         self.brush = brush
 
+    def bounds(self):
+        return _pad(QRectF(self.pos.x, self.pos.y, self.size.x, self.size.y).normalized(), self.pen)
+
     def draw(self, painter):
         if self.pen is not None:
             painter.setPen(self.pen)
@@ -866,6 +2547,8 @@ class Rect(Shape):
         painter.drawRect(self.pos.x, self.pos.y, self.size.x, self.size.y)
 
 class Circle(Shape):
+    __slots__ = ('pos', 'radius', 'pen', 'brush')
+
     def __init__(self, pos, radius, pen=None, brush=None):
         super().__init__()
         self.pos = pos
@@ -873,6 +2556,9 @@ class Circle(Shape):
         self.pen = pen
         self.brush = brush
 
+    def bounds(self):
+        return _pad(QRectF(self.pos.x - self.radius, self.pos.y - self.radius, 2 * self.radius, 2 * self.radius), self.pen)
+
     def draw(self, painter):
         if self.pen is not None:
             painter.setPen(self.pen)
@@ -883,6 +2569,14 @@ class Circle(Shape):
         painter.drawEllipse(QPointF(*self.pos), self.radius, self.radius)
 
 class Text(Shape):
+    """
+    A plain text label aligned within a rectangle
+
+    The text is laid out once into a QStaticText, which is only rebuilt when the text, size, alignment or font are reassigned
+    (or when the painter's font changes for labels without a font of their own).
+    """
+    __slots__ = ('pos', '_size', '_alignment', '_text', 'pen', '_font', '_static_text')
+
     def __init__(self, pos, size, alignment, text, pen=None, font=None):
         super().__init__()
         self.pos = pos
@@ -892,22 +2586,237 @@ class Text(Shape):
         self.pen = pen
         self.font = font
 
+    @property
+    def text(self):
+        return self._text
+    @text.setter
+    def text(self, value):
+        self._text = value
+        self._static_text = None
+
+    @property
+    def size(self):
+        return self._size
+    @size.setter
+    def size(self, value):
+        self._size = value
+        self._static_text = None
+
+    @property
+    def alignment(self):
+        return self._alignment
+    @alignment.setter
+    def alignment(self, value):
+        self._alignment = value
+        self._static_text = None
+
+    @property
+    def font(self):
+        return self._font
+    @font.setter
+    def font(self, value):
+        self._font = value
+        self._static_text = None
+
+    def bounds(self):
+        rect = QRectF(self.pos.x, self.pos.y, self.size.x, self.size.y).normalized()
+        if int(self._alignment) & Qt.TextDontClip: # If the text may overflow the rectangle, ...
+            if self._static_text is None:
+                return None # The extent of the text is unknown until the text is laid out
+            static_text, offset = self._static_text[:2]
+            rect = rect.united(QRectF(QPointF(*self.pos) + offset, static_text.size()))
+        return _pad(rect, self.pen)
+
+    def _prepare(self, font):
+        alignment = int(self._alignment)
+        width, height = float(self._size[0]), float(self._size[1])
+        static_text = QtGui.QStaticText(self._text)
+        static_text.setTextFormat(Qt.PlainText)
+        static_text.setTextOption(QtGui.QTextOption(Qt.Alignment(alignment & Qt.AlignHorizontal_Mask)))
+        if alignment & Qt.TextWordWrap: static_text.setTextWidth(width)
+        static_text.prepare(QTransform(), font)
+
+        # Align the laid out text within the rectangle
+        text_size = static_text.size()
+        dx = dy = 0.0
+        if alignment & Qt.AlignRight: dx = width - text_size.width()
+        elif alignment & Qt.AlignHCenter: dx = (width - text_size.width()) / 2
+        if alignment & Qt.AlignBottom: dy = height - text_size.height()
+        elif alignment & Qt.AlignVCenter: dy = (height - text_size.height()) / 2
+        clip = not alignment & Qt.TextDontClip and (text_size.width() > width or text_size.height() > height)
+
+        self._static_text = (static_text, QPointF(dx, dy), clip, font)
+
     def draw(self, painter):
         if self.pen is not None: painter.setPen(self.pen)
-        if self.font is not None: painter.setFont(self.font)
+        if self._font is not None:
+            painter.setFont(self._font)
+            if self._static_text is None: self._prepare(self._font)
+        else:
+            font = painter.font()
+            if self._static_text is None or self._static_text[3] != font: self._prepare(font)
+        static_text, offset, clip, _ = self._static_text
+
         painter.setWorldTransform(self._owner.transform)
-        painter.drawText(self.pos.x, self.pos.y, self.size.x, self.size.y, self.alignment, self.text)
+        pos = QPointF(*self.pos)
+        if clip: # If the text overflows the rectangle, ...
+            painter.save()
+            painter.setClipRect(QRectF(*self.pos, *self._size), Qt.IntersectClip)
+            painter.drawStaticText(pos + offset, static_text)
+            painter.restore()
+        else:
+            painter.drawStaticText(pos + offset, static_text)
 
 class Image(Shape):
-    def __init__(self, pos, size, image):
+    """
+    A pixmap drawn at pos, optionally stretched to size
+
+    Unless the layer is rotated or mirrored, the pixmap is drawn from a copy pre-scaled to its size on the device, kept in the canvas's pixmap cache.
+    If mipmaps is True, scaled copies are derived from a chain of halved copies of the pixmap, which makes zooming out cheap.
+    If image is a file path, the image is decoded in the background and the placeholder (a gray pixel by default) is drawn until decoding finishes.
+    Await the `loaded` event to wait for decoding to finish.
+    """
+    __slots__ = ('pos', 'size', 'image', 'mipmaps', 'loaded')
+
+    def __init__(self, pos, size, image, mipmaps=False, placeholder=None):
         super().__init__()
         self.pos = pos
         self.size = size
-        self.image = image
+        self.mipmaps = mipmaps
+        if isinstance(image, str): # If image is a file path, ...
+            if placeholder is None:
+                placeholder = QPixmap(1, 1)
+                placeholder.fill(Qt.lightGray)
+            self.image = placeholder
+            self.loaded = load_image(image, callback=self._onloaded)
+        else:
+            self.image = image
+            self.loaded = None
+
+    def _onloaded(self, image):
+        if image.isNull() or self._owner.removed: # If decoding failed or the image was removed meanwhile, ...
+            return
+        old_bounds = self.bounds()
+        self.image = QPixmap.fromImage(image)
+        canvas = self._owner._canvas
+        if isinstance(canvas, QWidget):
+            # Repaint only the area covered by the image (before and after loading)
+            transform = self._owner.transform
+            canvas.update(transform.mapRect(old_bounds.united(self.bounds())).toAlignedRect().adjusted(-1, -1, 1, 1))
+
+    def bounds(self):
+        if self.size is not None:
+            return QRectF(*self.pos, *self.size).normalized()
+        return QRectF(*self.pos, self.image.width(), self.image.height())
+
+    def _mipmap(self, cache, width, height):
+        """
+        Return the smallest mipmap level that is at least width x height pixels large
+        """
+        source = self.image
+        level = 0
+        while source.width() >= 2 * width and source.height() >= 2 * height:
+            level += 1
+            key = (self.image.cacheKey(), level)
+            mipmap = cache.get(key)
+            if mipmap is None:
+                mipmap = cache.put(key, source.scaled(source.width() // 2, source.height() // 2, Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+            source = mipmap
+        return source
+
+    def _scaled(self, cache, width, height):
+        if width == self.image.width() and height == self.image.height():
+            return self.image
+        key = (self.image.cacheKey(), width, height)
+        pixmap = cache.get(key)
+        if pixmap is None:
+            source = self._mipmap(cache, width, height) if self.mipmaps else self.image
+            pixmap = cache.put(key, source.scaled(width, height, Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+        return pixmap
 
     def draw(self, painter):
-        painter.setWorldTransform(self._owner.transform)
-        if self.size is not None:
-            painter.drawPixmap(QRectF(*self.pos, *self.size), self.image, QRectF(0, 0, self.image.width(), self.image.height()))
+        transform = self._owner.transform
+        target = QRectF(*self.pos, *self.size) if self.size is not None else QRectF(*self.pos, self.image.width(), self.image.height())
+        cache = self._owner._canvas.pixmap_cache
+        if transform.type() <= QTransform.TxScale and transform.m11() > 0 and transform.m22() > 0: # If the layer is neither rotated nor mirrored, ...
+            device_rect = transform.mapRect(target)
+            ratio = painter.device().devicePixelRatioF()
+            width, height = round(device_rect.width() * ratio), round(device_rect.height() * ratio)
+            if width <= 0 or height <= 0:
+                return
+            pixmap = self._scaled(cache, width, height)
+            painter.setWorldTransform(QTransform()) # The pixmap is already scaled to device pixels
+            painter.drawPixmap(device_rect, pixmap, QRectF(pixmap.rect()))
         else:
-            painter.drawPixmap(QPointF(*self.pos), self.image)
+            if self.mipmaps:
+                device_rect = transform.mapRect(target)
+                pixmap = self._mipmap(cache, device_rect.width(), device_rect.height())
+            else:
+                pixmap = self.image
+            painter.setWorldTransform(transform)
+            painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
+
+class PlotSeries(Shape):
+    """
+    A data series of a PlotWidget, backed by a ring buffer of the given capacity
+
+    x-values have to be monotonically increasing. If no x-values are appended, samples are numbered consecutively.
+    Series with more points than pixel columns are drawn as the minimum and maximum of each column.
+    These are gathered from min/max summaries maintained on append, so draw cost is bounded by the width of the plot rather than the number of points.
+    """
+    __slots__ = ('_plot', '_buffer', 'pen')
+
+    def __init__(self, capacity=100000, pen=None):
+        super().__init__()
+        self._plot = _find_parent(PlotWidget)
+        if self._plot is None:
+            raise Exception("PlotSeries needs to be defined inside a PlotWidget")
+        self._buffer = _RingBuffer(capacity)
+        self.pen = pen
+
+    def append(self, y, x=None):
+        y = np.atleast_1d(np.asarray(y, np.float64))
+        if x is None:
+            x = np.arange(self._buffer._end, self._buffer._end + len(y), dtype=np.float64)
+        else:
+            x = np.atleast_1d(np.asarray(x, np.float64))
+        self._buffer.append(x, y)
+        self._plot.update()
+
+    def clear(self):
+        self._buffer.clear()
+        self._plot.update()
+
+    def data(self):
+        return self._buffer.data()
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def draw(self, painter):
+        buffer = self._buffer
+        xmin, xmax, ymin, ymax = self._plot._paint_range or self._plot.view_range()
+        start, end = 0, len(buffer)
+        if self._plot.xrange is not None: # If the x-range is fixed, ...
+            # Restrict data to the visible range (plus one sample on either side to connect to off-screen points)
+            start, end = buffer.searchsorted((xmin, xmax))
+            start, end = max(0, start - 1), min(len(buffer), end + 1)
+        if end - start < 2:
+            return
+
+        # Summarize the data by the coarsest pyramid level with at least two blocks per pixel column, so that draw cost is bounded by the width of the plot
+        viewport = painter.viewport()
+        samples_per_block = (end - start) / (2.0 * max(1, viewport.width()))
+        level = min(int(math.log(samples_per_block, buffer.FACTOR)), len(buffer._min)) - 1 if samples_per_block >= buffer.FACTOR else -1
+        x, y0, y1 = buffer.minmax(start, end, level)
+
+        px = (x - xmin) * (viewport.width() / (xmax - xmin)) + viewport.x()
+        if level >= 0 or len(x) > 2 * viewport.width():
+            px, y = _decimate_minmax(px, y0, y1)
+        else:
+            y = y0
+        py = (ymax - y) * (viewport.height() / (ymax - ymin)) + viewport.y()
+
+        if self.pen is not None: painter.setPen(self.pen)
+        painter.setWorldTransform(QTransform()) # Points are already in device coordinates
+        painter.drawPolyline(_polygon_from_arrays(px, py))
@@ -2,11 +2,14 @@
 # Copyright (c) Sebastian Klaassen. All Rights Reserved.
 # Distributed under the MIT License. See LICENSE file for more info.
 
+import collections
+import itertools
+import time
 from asyncframes import *
 from qt5frames import *
 
 __all__ = [
-    'MessageBox', 'InputBox', 'ProgressBox'
+    'MessageBox', 'InputBox', 'ProgressBox', 'ProgressHandle'
 ]
 
 @Dialog(layout=Layout.vbox)
@@ -46,45 +49,114 @@ async def InputBox(self, message, buttons=(DialogButtonBox.StandardButton.Yes |
 
 #     await hold()
 
-@Dialog(layout=Layout.vbox)
-async def ProgressBox(self, message, minimum=None, maximum=None):
+class ProgressHandle(object):
+    """
+    The progress of a job, updated by worker threads without locks and sampled by a ProgressBox at a fixed rate
+
+    step() advances an itertools.count, while step(n) and set() append to a deque, all of which are atomic under the GIL. minimum, maximum and cancelled are plain attributes.
+    set() also records the position of the count, so that single steps after set() add to the new value.
+    Updates are only displayed when the handle is sampled, so jobs with millions of steps don't generate millions of UI events.
+    value, throughput (steps per second) and eta (seconds) are estimated from the samples of the last `window` seconds.
+    """
+    def __init__(self, minimum=0, maximum=100, window=5.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.window = window
+        self.cancelled = False # Set by ProgressBox, if the dialog was closed before the job finished
+        self.value = minimum
+        self.throughput = None
+        self.eta = None
+        self._steps = itertools.count()
+        self._reads = 0 # Number of times self._steps was advanced for anything else than a single step
+        self._updates = collections.deque() # (n, None) tuples of step(n) and (value, position of self._steps) tuples of set(value) in call order
+        self._offset = 0 # Value relative to self.minimum, excluding single steps, so that steps count up from the current minimum
+        self._samples = collections.deque() # (time, value) tuples of the last `window` seconds
+
+    def step(self, n=1):
+        if n == 1:
+            next(self._steps)
+        else:
+            self._updates.append((n, None))
+
+    def post(self, n=None):
+        """
+        Alias of step(), compatible with the former ProgressBox.progress event
+        """
+        self.step(1 if n is None else n)
+
+    def set(self, value):
+        self._updates.append((value, next(self._steps)))
+
+    def sample(self):
+        """
+        Update value, throughput and eta (called from the GUI thread)
+        """
+        position = next(self._steps)
+        while self._updates:
+            n, set_position = self._updates.popleft()
+            if set_position is None: # If this is a call to step(n), ...
+                self._offset += n
+            else: # If this is a call to set(n), discard all steps before it
+                self._offset = n - self.minimum - (set_position - self._reads)
+                self._reads += 1
+        steps = position - self._reads
+        self._reads += 1
+        self.value = max(self.minimum, min(self.maximum, self.minimum + self._offset + steps))
+
+        now = time.perf_counter()
+        self._samples.append((now, self.value))
+        while now - self._samples[0][0] > self.window:
+            self._samples.popleft()
+        t0, value0 = self._samples[0]
+        if now > t0:
+            self.throughput = (self.value - value0) / (now - t0)
+            self.eta = (self.maximum - self.value) / self.throughput if self.throughput > 0 else None
+        return self.value
+
+class _ProgressDialog(Dialog):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.progress = ProgressHandle() # Created before the frame function starts, so that the handle can be passed to workers right away
+
+    value = property(lambda self: self.progress.value, lambda self, value: self.progress.set(value))
+    minimum = property(lambda self: self.progress.minimum, lambda self, value: setattr(self.progress, 'minimum', value))
+    maximum = property(lambda self: self.progress.maximum, lambda self, value: setattr(self.progress, 'maximum', value))
+
+@_ProgressDialog(layout=Layout.vbox)
+async def ProgressBox(self, message, minimum=None, maximum=None, progress=None, fps=20):
+    """
+    A dialog showing the progress of a job, as well as its throughput and remaining time
+
+    Worker threads report progress through self.progress, a ProgressHandle (pass progress to share an existing handle).
+    The dialog samples the handle fps times per second and closes when the maximum is reached.
+    If the dialog is closed or canceled earlier, self.progress.cancelled is set to True.
+    """
     if message is not None: Label(message)
     self.pb = ProgressBar()
+    self.status = Label("")
     DialogButtonBox(DialogButtonBox.StandardButton.Cancel)
 
-    self.progress = Event("ProgressBox.progress")
-    self.set_value = Event("ProgressBox.set_value")
-    self.set_minimum = Event("ProgressBox.set_minimum")
-    self.set_maximum = Event("ProgressBox.set_maximum")
-
+    if progress is not None:
+        self.progress = progress
     if minimum is not None:
-        self.pb.setMinimum(minimum)
+        self.progress.minimum = minimum
     if maximum is not None:
-        self.pb.setMaximum(maximum)
-    self.pb.setValue(self.pb.value)
-
-    Dialog.value = property(lambda self: self.pb.value, lambda self, value: self.set_value.post(value))
-    Dialog.minimum = property(lambda self: self.pb.minimum, lambda self, value: self.set_minimum.post(value))
-    Dialog.maximum = property(lambda self: self.pb.maximum, lambda self, value: self.set_maximum.post(value))
-
-    while True:
-        event, value = await any_(self.progress, self.set_value, self.set_minimum, self.set_maximum)
-        if event == self.progress:
-            value = self.pb.value + (1 if value is None else value)
-            value = max(self.pb.minimum, min(self.pb.maximum, value))
-            self.pb.setValue(value)
-            if value >= self.pb.maximum:
-                break
-        elif event == self.set_value:
-            value = max(self.pb.minimum, min(self.pb.maximum, value))
+        self.progress.maximum = maximum
+
+    finished = False
+    try:
+        while True:
+            value = self.progress.sample()
+            if (self.pb.minimum, self.pb.maximum) != (self.progress.minimum, self.progress.maximum):
+                self.pb.setRange(self.progress.minimum, self.progress.maximum)
             self.pb.setValue(value)
-            if value >= self.pb.maximum:
+            if self.progress.eta is not None:
+                eta = int(self.progress.eta)
+                self.status.setText("{:.0f}/s, {}:{:02d} remaining".format(self.progress.throughput, eta // 60, eta % 60))
+            if value >= self.progress.maximum:
+                finished = True
                 break
-        elif event == self.set_minimum:
-            self.pb.setMinimum(value)
-        elif event == self.set_maximum:
-            self.pb.setMaximum(value)
-
-    Dialog.value = property(lambda self: 0, lambda self, value: None)
-    Dialog.minimum = property(lambda self: 0, lambda self, value: None)
-    Dialog.maximum = property(lambda self: 0, lambda self, value: None)
+            await sleep(1.0 / fps)
+    finally:
+        if not finished: # If the dialog was closed before the job finished, ...
+            self.progress.cancelled = True
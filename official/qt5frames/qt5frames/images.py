@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Sebastian Klaassen. All Rights Reserved.
+# Distributed under the MIT License. See LICENSE file for more info.
+
+import collections
+import concurrent.futures
+import hashlib
+import os
+import numpy as np
+from PyQt5 import QtCore, QtGui, sip
+from asyncframes import Event
+
+__all__ = [
+    'PixmapCache', 'ImageLoader', 'ThumbnailCache', 'load_image'
+]
+
+
+class PixmapCache(object):
+    """
+    A least recently used cache of pixmaps, bounded by a memory budget in bytes
+
+    Each canvas owns a cache that is shared by all of its images. Assign the same cache to several canvases to share a single budget.
+    """
+    def __init__(self, budget=64 * 1024 * 1024):
+        self.budget = budget
+        self.size = 0
+        self._pixmaps = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._pixmaps)
+
+    @staticmethod
+    def _cost(pixmap):
+        return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+    def get(self, key):
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+        return pixmap
+
+    def put(self, key, pixmap):
+        """
+        Cache pixmap under key, evicting least recently used pixmaps until the cache fits its budget
+
+        Returns pixmap. Pixmaps larger than the whole budget aren't cached.
+        """
+        old_pixmap = self._pixmaps.pop(key, None)
+        if old_pixmap is not None:
+            self.size -= self._cost(old_pixmap)
+        cost = self._cost(pixmap)
+        if cost <= self.budget:
+            self._pixmaps[key] = pixmap
+            self.size += cost
+            while self.size > self.budget:
+                _, evicted_pixmap = self._pixmaps.popitem(last=False)
+                self.size -= self._cost(evicted_pixmap)
+        return pixmap
+
+    def clear(self):
+        self._pixmaps.clear()
+        self.size = 0
+
+def _decode(path, size, raw):
+    """
+    Decode an image file into a QImage (runs on a worker thread)
+    """
+    if raw is not None: # If the file is an uncompressed pixel buffer, ...
+        # Map the file into memory instead of reading and decoding it
+        width, height, image_format = raw[:3]
+        offset = raw[3] if len(raw) > 3 else 0
+        bytes_per_line = QtGui.QImage(1, 1, image_format).depth() // 8 * width # Assumes pixel formats of at least 8 bits per pixel
+        mapping = np.memmap(path, np.uint8, 'r', offset, (height, bytes_per_line))
+        image = QtGui.QImage(sip.voidptr(mapping.ctypes.data), width, height, bytes_per_line, image_format)
+        image._mapping = mapping # The QImage doesn't own its pixels, so keep the mapping alive as long as the image
+        if size is not None:
+            image = image.scaled(*size, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
+        return image
+
+    reader = QtGui.QImageReader(path)
+    reader.setAutoTransform(True)
+    if size is not None:
+        # Let the decoder downscale while decoding (much faster for large JPEGs)
+        source_size = reader.size()
+        if source_size.isValid():
+            reader.setScaledSize(source_size.scaled(*size, QtCore.Qt.KeepAspectRatio))
+    return reader.read() # A null QImage, if decoding failed
+
+class ImageLoader(QtCore.QObject):
+    """
+    Decodes images on a pool of worker threads
+
+    load() returns an event that is posted with the decoded QImage once decoding finishes. Decoding errors result in a null QImage.
+    Optional callbacks are called with the QImage on the thread that created the loader (usually the GUI thread), where QPixmaps can safely be created.
+    """
+    _decoded = QtCore.pyqtSignal(object, object, object) # Event, callback, QImage
+
+    def __init__(self, max_workers=None):
+        super().__init__()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers or min(8, os.cpu_count() or 4), "ImageLoader")
+        self._decoded.connect(self._ondecoded) # Emitted by worker threads, so the connection is queued to the thread of this loader
+
+    def load(self, path, size=None, raw=None, callback=None):
+        """
+        Decode the image file at path asynchronously
+
+        If size is a (width, height) tuple, the image is downscaled to fit into size while decoding.
+        If raw is a (width, height, QImage.Format[, offset]) tuple, the file is treated as an uncompressed pixel buffer and memory-mapped instead of decoded.
+        """
+        return self._submit(_decode, (path, size, raw), callback)
+
+    def _submit(self, decode, args, callback):
+        loaded = Event("ImageLoader.loaded", singleshot=True)
+        self._executor.submit(self._decode, decode, args, loaded, callback)
+        return loaded
+
+    def _decode(self, decode, args, loaded, callback):
+        try:
+            image = decode(*args)
+        except Exception:
+            image = QtGui.QImage()
+        self._decoded.emit(loaded, callback, image)
+
+    def _ondecoded(self, loaded, callback, image):
+        if callback is not None:
+            callback(image)
+        loaded.post(image)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait)
+
+_default_loader = None
+
+def _get_default_loader():
+    global _default_loader
+    if _default_loader is None:
+        _default_loader = ImageLoader()
+    return _default_loader
+
+def load_image(path, size=None, raw=None, callback=None):
+    """
+    Decode the image file at path on the shared default ImageLoader
+
+    See ImageLoader.load().
+    """
+    return _get_default_loader().load(path, size, raw, callback)
+
+def _signature(path):
+    """
+    Return the modification time and size of the file at path, or None if it doesn't exist
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+class ThumbnailCache(object):
+    """
+    Thumbnails of image files, cached in memory and on disk
+
+    Thumbnails are kept in a PixmapCache bounded by budget bytes and as PNG files in directory, named after a hash of the source path,
+    modification time and file size, so they survive restarts and are regenerated when the source changes.
+    Missing thumbnails are generated on the worker threads of loader (the shared default ImageLoader, if loader is None).
+    Images that couldn't be decoded are only retried once their file changes.
+    """
+    def __init__(self, size=(128, 128), directory=None, budget=32 * 1024 * 1024, loader=None):
+        self.size = tuple(size)
+        if directory is None:
+            directory = os.path.join(QtCore.QStandardPaths.writableLocation(QtCore.QStandardPaths.CacheLocation), "thumbnails")
+        self.directory = directory
+        self.pixmaps = PixmapCache(budget)
+        self._loader = loader
+        self._pending = {} # Source path -> (event, callbacks) of thumbnails being generated
+        self._failed = {} # Source path -> file signature (see _signature()) of images that couldn't be decoded
+
+    def get(self, path):
+        """
+        Return the thumbnail of the image file at path, if it's cached in memory, or None
+        """
+        return self.pixmaps.get(os.path.abspath(path))
+
+    def request(self, path, callback=None):
+        """
+        Load or generate the thumbnail of the image file at path in the background
+
+        Returns an event that is posted with the thumbnail QPixmap. If the image couldn't be decoded, the QPixmap is null.
+        callback is called with the same QPixmap before the event is posted.
+        """
+        path = os.path.abspath(path)
+        pixmap = self.pixmaps.get(path)
+        if pixmap is None and path in self._failed:
+            if self._failed[path] == _signature(path): # If the image didn't change since it failed to decode, ...
+                pixmap = QtGui.QPixmap()
+            else:
+                del self._failed[path]
+        if pixmap is not None: # If the thumbnail is known, ...
+            loaded = Event("ThumbnailCache.loaded", singleshot=True)
+            if callback is not None: callback(pixmap)
+            loaded.post(pixmap)
+            return loaded
+
+        if path in self._pending: # If the thumbnail is already being generated, ...
+            loaded, callbacks = self._pending[path]
+        else:
+            loaded, callbacks = self._pending[path] = (Event("ThumbnailCache.loaded", singleshot=True), [])
+            (self._loader or _get_default_loader())._submit(self._load, (path,), lambda image: self._onloaded(path, image))
+        if callback is not None:
+            callbacks.append(callback)
+        return loaded
+
+    def _cache_file(self, path):
+        stat = os.stat(path)
+        key = "{}|{}|{}|{}x{}".format(path, stat.st_mtime_ns, stat.st_size, *self.size)
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + ".png")
+
+    def _load(self, path):
+        """
+        Read the thumbnail from the disk cache or generate it (runs on a worker thread)
+        """
+        cache_file = self._cache_file(path)
+        image = QtGui.QImage(cache_file) if os.path.exists(cache_file) else QtGui.QImage()
+        if image.isNull(): # If the thumbnail isn't cached on disk, ...
+            image = _decode(path, self.size, None)
+            if not image.isNull():
+                # Write to a temporary file first, so that concurrent readers never see partial thumbnails
+                os.makedirs(self.directory, exist_ok=True)
+                temp_file = "{}.{}.tmp".format(cache_file, os.getpid())
+                if image.save(temp_file, "PNG"):
+                    os.replace(temp_file, cache_file)
+        return image
+
+    def _onloaded(self, path, image):
+        loaded, callbacks = self._pending.pop(path)
+        if image.isNull():
+            self._failed[path] = _signature(path)
+            pixmap = QtGui.QPixmap()
+        else:
+            pixmap = self.pixmaps.put(path, QtGui.QPixmap.fromImage(image))
+        for callback in callbacks:
+            callback(pixmap)
+        loaded.post(pixmap)
+
+    def clear(self, disk=False):
+        """
+        Forget all thumbnails cached in memory (and on disk, if disk is True)
+        """
+        self.pixmaps.clear()
+        self._failed.clear()
+        if disk and os.path.isdir(self.directory):
+            for filename in os.listdir(self.directory):
+                if filename.endswith(".png"):
+                    os.remove(os.path.join(self.directory, filename))
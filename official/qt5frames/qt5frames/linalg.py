@@ -5,6 +5,7 @@
 import numbers
 import math
 import numpy as np
+from PyQt5.QtGui import QTransform
 try:
 	import quaternion
 except ImportError:
@@ -16,7 +17,7 @@ except ImportError:
 
 __all__ = [
 	'lerp', 'saturate', 'sqlength', 'length', 'normalize', 'dot', 'cross', 'reflect', 'mod', 'step',
-	'mat4', 'quat', 'vec2', 'vec2a', 'vec3', 'vec3a', 'vec4', 'vec4a'
+	'mat4', 'quat', 'quata', 'vec2', 'vec2a', 'vec3', 'vec3a', 'vec4', 'vec4a'
 ]
 
 def lerp(origin, target, f):
@@ -43,7 +44,7 @@ def lerp(origin, target, f):
 			origin.y * g + target.y * f
 		)
 	elif isinstance(origin, quat) and isinstance(target, quat):
-		return quaternion.slerp_evaluate(origin, target, f)
+		return quat.slerp(origin, target, f)
 	else:
 		raise TypeError
 
@@ -249,46 +250,47 @@ class vec4(np.ndarray):
 	def copyto(self, v): np.copyto(v, self)
 	def clone(self): return vec4(self) #TODO: Consider replacing with np.ndarray.clone()
 
-class mat4(np.matrix):
-	def __new__(cls, *elements):
-		return super(mat4, cls).__new__(cls, np.array(np.empty((4, 4)), np.float32, copy=False))
-	def __init__(self, *args, **kwargs):
+def _ortho(left, right, bottom, top, znear, zfar):
+	return (
+		(2.0 / (right - left), 0.0, 0.0, 0.0),
+		(0.0, 2.0 / (top - bottom), 0.0, 0.0),
+		(0.0, 0.0, -2.0 / (zfar - znear), 0.0),
+		((left + right) / (left - right), (bottom + top) / (bottom - top), (znear + zfar) / (znear - zfar), 1.0)
+	)
+
+def _frustum(left, right, bottom, top, znear, zfar):
+	# Source: https://www.khronos.org/opengl/wiki/GluPerspective_code
+	temp = 2.0 * znear
+	temp2 = right - left
+	temp3 = top - bottom
+	temp4 = zfar - znear
+	return (
+		(temp / temp2, 0.0, 0.0, 0.0),
+		(0.0, temp / temp3, 0.0, 0.0),
+		((right + left) / temp2, (top + bottom) / temp3, (-zfar - znear) / temp4, -1.0),
+		(0.0, 0.0, (-temp * zfar) / temp4, 0.0)
+	)
+
+_IDENTITY4 = np.identity(4, np.float32)
+_QTRANSFORM_INDEX = np.ix_((0, 1, 3), (0, 1, 3)) # Rows/columns of mat4 that map to the 3x3 QTransform (x, y, w)
+
+class mat4(np.ndarray):
+	def __new__(cls, *args):
+		return super(mat4, cls).__new__(cls, (4, 4), np.float32)
+	def __init__(self, *args):
 		super(mat4, self).__init__()
 		if args:
-			idx = 0
-			for arg in args:
-				if isinstance(arg, numbers.Number):
-					if idx >= 16:
-						raise ValueError("Too many arguments to mat4()")
-					self.put(idx, arg)
-					idx += 1
-				elif hasattr(arg, '__len__'):
-					if hasattr(arg, 'flat'):
-						arg = arg.flat
-					if idx + len(arg) > 16:
-						raise ValueError("Too many arguments to mat4()")
-					for i, val in enumerate(arg):
-						self.put(idx + i, val)
-					idx += len(arg)
-			if idx != 16:
+			try:
+				values = np.asarray(args, np.float32).ravel()
+			except ValueError: # If args mixes numbers and sequences, ...
+				values = np.concatenate([np.ravel(arg) for arg in args])
+			if values.size > 16:
+				raise ValueError("Too many arguments to mat4()")
+			if values.size < 16:
 				raise ValueError("Too little arguments to mat4()")
+			np.copyto(self, values.reshape(4, 4), casting='unsafe')
 		else:
-			self[0, 0] = 1.0
-			self[0, 1] = 0.0
-			self[0, 2] = 0.0
-			self[0, 3] = 0.0
-			self[1, 0] = 0.0
-			self[1, 1] = 1.0
-			self[1, 2] = 0.0
-			self[1, 3] = 0.0
-			self[2, 0] = 0.0
-			self[2, 1] = 0.0
-			self[2, 2] = 1.0
-			self[2, 3] = 0.0
-			self[3, 0] = 0.0
-			self[3, 1] = 0.0
-			self[3, 2] = 0.0
-			self[3, 3] = 1.0
+			np.copyto(self, _IDENTITY4)
 
 	def __array_finalize__(self, obj):
 		if obj is None: return
@@ -296,63 +298,15 @@ class mat4(np.matrix):
 	#def __str__(self):
 	#	return super.__str__(self)
 	def ortho(self, left, right, bottom, top, znear, zfar):
-		self[0, 0] = 2.0 / (right - left)
-		self[0, 1] = 0.0
-		self[0, 2] = 0.0
-		self[0, 3] = 0.0
-		self[1, 0] = 0.0
-		self[1, 1] = 2.0 / (top - bottom)
-		self[1, 2] = 0.0
-		self[1, 3] = 0.0
-		self[2, 0] = 0.0
-		self[2, 1] = 0.0
-		self[2, 2] = -2.0 / (zfar - znear)
-		self[2, 3] = 0.0
-		self[3, 0] = (left + right) / (left - right)
-		self[3, 1] = (bottom + top) / (bottom - top)
-		self[3, 2] = (znear + zfar) / (znear - zfar)
-		self[3, 3] = 1.0
+		self[:] = _ortho(left, right, bottom, top, znear, zfar)
 	@staticmethod
 	def from_ortho(left, right, bottom, top, znear, zfar):
-		return mat4(
-			2.0 / (right - left), 0.0, 0.0, 0.0,
-			0.0 ,2.0 / (top - bottom), 0.0, 0.0,
-			0.0, 0.0, -2.0 / (zfar - znear), 0.0,
-			(left + right) / (left - right), (bottom + top) / (bottom - top), (znear + zfar) / (znear - zfar), 1.0)
+		return mat4(_ortho(left, right, bottom, top, znear, zfar))
 	def frustum(self, left, right, bottom, top, znear, zfar):
-		# Source: https://www.khronos.org/opengl/wiki/GluPerspective_code
-		temp = 2.0 * znear
-		temp2 = right - left
-		temp3 = top - bottom
-		temp4 = zfar - znear
-		self[0, 0] = temp / temp2
-		self[0, 1] = 0.0
-		self[0, 2] = 0.0
-		self[0, 3] = 0.0
-		self[1, 0] = 0.0
-		self[1, 1] = temp / temp3
-		self[1, 2] = 0.0
-		self[1, 3] = 0.0
-		self[2, 0] = (right + left) / temp2
-		self[2, 1] = (top + bottom) / temp3
-		self[2, 2] = (-zfar - znear) / temp4
-		self[2, 3] = -1.0
-		self[3, 0] = 0.0
-		self[3, 1] = 0.0
-		self[3, 2] = (-temp * zfar) / temp4
-		self[3, 3] = 0.0
+		self[:] = _frustum(left, right, bottom, top, znear, zfar)
 	@staticmethod
 	def from_frustum(left, right, bottom, top, znear, zfar):
-		# Source: https://www.khronos.org/opengl/wiki/GluPerspective_code
-		temp = 2.0 * znear
-		temp2 = right - left
-		temp3 = top - bottom
-		temp4 = zfar - znear
-		return mat4(
-			temp / temp2, 0.0, 0.0, 0.0,
-			0.0, temp / temp3, 0.0, 0.0,
-			(right + left) / temp2, (top + bottom) / temp3, (-zfar - znear) / temp4, -1.0,
-			0.0, 0.0, (-temp * zfar) / temp4, 0.0)
+		return mat4(_frustum(left, right, bottom, top, znear, zfar))
 	def perspective(self, fovy, aspect_ratio, znear, zfar):
 		# Source: https://www.khronos.org/opengl/wiki/GluPerspective_code
 		ymax = znear * math.tan(fovy * math.pi / 360.0)
@@ -365,6 +319,19 @@ class mat4(np.matrix):
 		xmax = ymax * aspect_ratio
 		return mat4.from_frustum(-xmax, xmax, -ymax, ymax, znear, zfar)
 
+	def to_qtransform(self):
+		# mat4 and QTransform both use row vectors, so the 2D affine part maps directly onto QTransform.setMatrix()
+		return QTransform(*self[_QTRANSFORM_INDEX].ravel().tolist())
+	@staticmethod
+	def from_qtransform(transform):
+		m = mat4()
+		m[_QTRANSFORM_INDEX] = (
+			(transform.m11(), transform.m12(), transform.m13()),
+			(transform.m21(), transform.m22(), transform.m23()),
+			(transform.m31(), transform.m32(), transform.m33())
+		)
+		return m
+
 	def copyto(self, m):
 		np.copyto(m, self)
 	def clone(self): #TODO: Consider replacing with np.ndarray.clone()
@@ -385,28 +352,73 @@ class mat4(np.matrix):
 		else:
 			raise ValueError()
 
+# Quaternion kernels operating on arrays of shape (..., 4) with components ordered (w, x, y, z)
+
+def _quat_multiply(a, b):
+	aw, ax, ay, az = np.moveaxis(a, -1, 0)
+	bw, bx, by, bz = np.moveaxis(b, -1, 0)
+	return np.stack((
+		aw * bw - ax * bx - ay * by - az * bz,
+		aw * bx + ax * bw + ay * bz - az * by,
+		aw * by - ax * bz + ay * bw + az * bx,
+		aw * bz + ax * by - ay * bx + az * bw
+	), axis=-1)
+
+def _quat_rotate(q, v):
+	w = q[..., :1]
+	r = q[..., 1:]
+	m = np.sum(q * q, axis=-1, keepdims=True)
+	return v + np.cross(2.0 * r, w * v + np.cross(r, v)) / m
+
+def _quat_slerp(a, b, t):
+	t = np.reshape(t, np.shape(t) + (1,))
+	d = np.sum(a * b, axis=-1, keepdims=True)
+	b = np.where(d < 0.0, -b, b) # Take the shortest path
+	theta = np.arccos(np.clip(np.abs(d), 0.0, 1.0))
+	sin_theta = np.sin(theta)
+	near = sin_theta < 1e-6 # Fall back to lerp for (nearly) identical rotations
+	sin_theta = np.where(near, 1.0, sin_theta)
+	wa = np.where(near, 1.0 - t, np.sin((1.0 - t) * theta) / sin_theta)
+	wb = np.where(near, t, np.sin(t * theta) / sin_theta)
+	return wa * a + wb * b
+
+def _quat_from_axis_angle(axis, angle):
+	half_angle = np.reshape(angle, np.shape(angle) + (1,)) * 0.5
+	xyz = np.sin(half_angle) * axis
+	return np.concatenate((np.broadcast_to(np.cos(half_angle), xyz.shape[:-1] + (1,)), xyz), axis=-1)
+
+def _quat_to_matrix(q):
+	w, x, y, z = np.moveaxis(q, -1, 0)
+	s = 2.0 / (w * w + x * x + y * y + z * z)
+	m = np.empty(q.shape[:-1] + (3, 3), q.dtype)
+	m[..., 0, 0] = 1.0 - s * (y * y + z * z)
+	m[..., 0, 1] = s * (x * y - z * w)
+	m[..., 0, 2] = s * (x * z + y * w)
+	m[..., 1, 0] = s * (x * y + z * w)
+	m[..., 1, 1] = 1.0 - s * (x * x + z * z)
+	m[..., 1, 2] = s * (y * z - x * w)
+	m[..., 2, 0] = s * (x * z - y * w)
+	m[..., 2, 1] = s * (y * z + x * w)
+	m[..., 2, 2] = 1.0 - s * (x * x + y * y)
+	return m
+
+def _quat_components(q):
+	if isinstance(q, np.quaternion):
+		return np.array((q.w, q.x, q.y, q.z))
+	return np.asarray(q)
+
 class quat(np.quaternion):
 	def __init__(self, *args):
-		if args:
-			q = np.empty((4,), np.float32)
-			idx = 0
-			for arg in args:
-				if isinstance(arg, numbers.Number):
-					if idx >= 4:
-						raise ValueError("Too many arguments to quat()")
-					q[idx] = arg
-					idx += 1
-				elif hasattr(arg, '__len__'):
-					if hasattr(arg, 'flat') and not isinstance(arg, np.quaternion):
-						arg = arg.flat
-					if idx + len(arg) > 4:
-						raise ValueError("Too many arguments to quat()")
-					for i, val in enumerate(arg):
-						q[idx + i] = val
-					idx += len(arg)
-			for idx in range(idx, 4):
-				q[idx] = 0
-			super(quat, self).__init__(*q)
+		if len(args) == 1 and isinstance(args[0], np.quaternion):
+			super(quat, self).__init__(args[0].w, args[0].x, args[0].y, args[0].z)
+		elif args:
+			try:
+				q = np.asarray(args, np.float64).ravel()
+			except (ValueError, TypeError): # If args mixes numbers, sequences and quaternions, ...
+				q = np.concatenate([np.ravel(_quat_components(arg)) for arg in args])
+			if q.size > 4:
+				raise ValueError("Too many arguments to quat()")
+			super(quat, self).__init__(*q.tolist(), *(0.0,) * (4 - q.size))
 		else:
 			super(quat, self).__init__(1, 0, 0, 0)
 
@@ -437,9 +449,7 @@ class quat(np.quaternion):
 		raise IndexError()
 	@staticmethod
 	def from_axis_angle(axis, angle):
-		angle /= 2
-		s = math.sin(angle)
-		return quat(math.cos(angle), s * axis.x, s * axis.y, s * axis.z)
+		return quat(*_quat_from_axis_angle(np.asarray(axis, np.float64), angle).tolist())
 	def look_at(self, eye, target, up):
 		zaxis = normalize(eye - target)
 		xaxis = normalize(cross(up, zaxis))
@@ -490,13 +500,56 @@ class quat(np.quaternion):
 		q.euler_angles(pitch, roll, yaw)
 		return q
 	def rotate_vector(self, v):
-		s = self[0]
-		r = np.array([self[1], self[2], self[3]])
-		m = np.inner(self, self).real
-		vr = v + np.cross(2.0 * r, s * v + np.cross(r, v)) / m
-		vr2 = quaternion.rotate_vectors([self], v)[0, :]
-		#assert(np.array_equal(vr, vr2)) #TODO: Assertion raised. Check equation
-		return vr2
+		return _quat_rotate(_quat_components(self), v)
+	def to_matrix(self):
+		return _quat_to_matrix(_quat_components(self))
+	@staticmethod
+	def slerp(origin, target, f):
+		return quat(*_quat_slerp(_quat_components(origin), _quat_components(target), f).tolist())
+
+class quata(np.ndarray):
+	def __new__(cls, arg):
+		if isinstance(arg, int):
+			return super(quata, cls).__new__(cls, (arg, 4), np.float32)
+		elif isinstance(arg, list):
+			return super(quata, cls).__new__(cls, (len(arg) if isinstance(arg[0], np.quaternion) else len(arg) // 4, 4), np.float32)
+		elif isinstance(arg, np.ndarray):
+			return super(quata, cls).__new__(cls, (arg.size // 4, 4), np.float32)
+		else:
+			raise ValueError
+	def __init__(self, arg):
+		super(quata, self).__init__()
+		if isinstance(arg, int):
+			np.copyto(self, (1.0, 0.0, 0.0, 0.0)) # Initialize to identity rotations
+		elif isinstance(arg, list) and isinstance(arg[0], np.quaternion):
+			np.copyto(self, [(q.w, q.x, q.y, q.z) for q in arg])
+		else:
+			np.copyto(self, np.reshape(arg, self.shape), casting='unsafe')
+	def __array_finalize__(self, obj):
+		if obj is None: return
+		self.info = getattr(obj, 'info', None)
+	def __str__(self):
+		return "quata[{}]".format(self.shape[0])
+	def __getitem__(self, idx):
+		if isinstance(idx, numbers.Integral):
+			return quat(*np.asarray(self)[idx].tolist())
+		return super(quata, self).__getitem__(idx)
+
+	def __mul__(self, other):
+		if isinstance(other, (quata, np.quaternion)):
+			return _quat_multiply(np.asarray(self), _quat_components(other)).astype(np.float32).view(quata)
+		return super(quata, self).__mul__(other)
+
+	def rotate_vectors(self, v):
+		return _quat_rotate(np.asarray(self), np.asarray(v, np.float32)).view(vec3a)
+	def to_matrix(self):
+		return _quat_to_matrix(np.asarray(self))
+	@staticmethod
+	def slerp(origin, target, f):
+		return _quat_slerp(_quat_components(origin), _quat_components(target), np.asarray(f, np.float32)).astype(np.float32).reshape(-1, 4).view(quata)
+	@staticmethod
+	def from_axis_angle(axis, angle):
+		return _quat_from_axis_angle(np.asarray(axis, np.float32), np.asarray(angle, np.float32)).reshape(-1, 4).view(quata)
 
 class vec2a(np.ndarray):
 	def __new__(cls, arg):
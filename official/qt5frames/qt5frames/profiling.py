@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Sebastian Klaassen. All Rights Reserved.
+# Distributed under the MIT License. See LICENSE file for more info.
+
+import collections
+import gc
+import json
+import os
+import threading
+import time
+from PyQt5 import QtWidgets, QtCore
+from asyncframes import Event, Frame
+
+__all__ = [
+    'PaintFrameStats', 'PaintProfiler', 'PaintProfilerOverlay', 'EventTracer', 'LeakDetector'
+]
+
+
+PaintFrameStats = collections.namedtuple('PaintFrameStats', ['duration', 'drawn', 'culled', 'state_changes'])
+
+class _CountingPainter(object):
+    """
+    A QPainter proxy that counts painter state changes (calls to any of the painter's setters)
+    """
+    def __init__(self, painter):
+        self._painter = painter
+        self.state_changes = 0
+
+    def __getattr__(self, name):
+        if name.startswith('set'):
+            self.state_changes += 1
+        return getattr(self._painter, name)
+
+class PaintProfiler(object):
+    """
+    Paint-time statistics of a canvas
+
+    Records the duration, the number of drawn and culled shapes and the number of painter state changes of the last `history` frames,
+    as well as the cumulative draw time per shape class.
+    """
+    def __init__(self, history=120):
+        self.frames = collections.deque(maxlen=history)
+        self.shape_times = collections.defaultdict(lambda: [0, 0.0]) # Shape class name -> [number of draws, cumulative seconds]
+        self._drawn = 0
+        self._culled = 0
+
+    def reset(self):
+        self.frames.clear()
+        self.shape_times.clear()
+
+    @property
+    def last_frame(self):
+        return self.frames[-1] if self.frames else None
+
+    def _paint(self, layer, painter):
+        painter = _CountingPainter(painter)
+        self._drawn = self._culled = 0
+        t0 = time.perf_counter()
+        layer._draw_profiled(painter, self)
+        self.frames.append(PaintFrameStats(time.perf_counter() - t0, self._drawn, self._culled, painter.state_changes))
+
+    def _record_shape(self, shape, duration):
+        self._drawn += 1
+        shape_time = self.shape_times[shape.__class__.__name__]
+        shape_time[0] += 1
+        shape_time[1] += duration
+
+    def _record_culled(self):
+        self._culled += 1
+
+    def summary(self):
+        """
+        Return a dictionary of paint statistics averaged over the recorded frames
+        """
+        num_frames = len(self.frames)
+        if num_frames == 0:
+            return {'frames': 0}
+        return {
+            'frames': num_frames,
+            'avg_ms': 1000.0 * sum(frame.duration for frame in self.frames) / num_frames,
+            'max_ms': 1000.0 * max(frame.duration for frame in self.frames),
+            'drawn': sum(frame.drawn for frame in self.frames) / num_frames,
+            'culled': sum(frame.culled for frame in self.frames) / num_frames,
+            'state_changes': sum(frame.state_changes for frame in self.frames) / num_frames,
+            'shapes': {name: (count, 1000.0 * seconds) for name, (count, seconds) in self.shape_times.items()},
+        }
+
+    def report(self):
+        """
+        Return a human readable paint report with shape classes ranked by cumulative draw time
+        """
+        summary = self.summary()
+        if summary['frames'] == 0:
+            return "No frames painted"
+        lines = [
+            "{:.2f} ms/frame (max {:.2f} ms) over {} frames".format(summary['avg_ms'], summary['max_ms'], summary['frames']),
+            "{:.0f} drawn, {:.0f} culled, {:.0f} state changes".format(summary['drawn'], summary['culled'], summary['state_changes']),
+        ]
+        for name, (count, ms) in sorted(summary['shapes'].items(), key=lambda item: -item[1][1]):
+            lines.append("{}: {:.2f} ms ({} draws)".format(name, ms, count))
+        return "\n".join(lines)
+
+class PaintProfilerOverlay(QtWidgets.QLabel):
+    """
+    A small translucent label showing the report of a PaintProfiler on top of its canvas
+
+    The label is refreshed by a timer, rather than from within paint events, to avoid repainting the canvas in a loop.
+    """
+    def __init__(self, profiler, parent, interval=0.25):
+        super().__init__(parent)
+        self.profiler = profiler
+        self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)
+        self.setStyleSheet("background-color: rgba(0, 0, 0, 160); color: white; font-family: monospace; padding: 2px;")
+        self.move(0, 0)
+        self._timer = QtCore.QTimer(self)
+        self._timer.timeout.connect(self.refresh)
+        self._timer.start(int(1000 * interval))
+        self.refresh()
+        self.show()
+
+    def refresh(self):
+        self.setText(self.profiler.report())
+        self.adjustSize()
+
+class EventTracer(object):
+    """
+    Counts posts and sends per event name and measures how long each resumed frame runs before yielding
+
+    While started, the tracer replaces Event.post, Event.send and Frame._step with instrumented versions. Stopping the tracer restores the originals,
+    so tracing costs nothing while disabled. Frame times are exclusive, i.e. they don't include frames resumed synchronously from within the measured frame.
+    Use `report()` for a ranked summary or `dump_chrome_trace()` for a file that can be loaded into chrome://tracing or Perfetto.
+    """
+    def __init__(self, max_trace_events=100000):
+        self.counts = collections.defaultdict(lambda: [0, 0]) # Event name -> [number of posts, number of sends]
+        self.frame_times = collections.defaultdict(lambda: [0, 0.0, 0.0]) # Frame name -> [number of resumptions, cumulative seconds, maximum seconds]
+        self.trace_events = collections.deque(maxlen=max_trace_events)
+        self._originals = None
+        self._local = threading.local()
+        self._t0 = time.perf_counter()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        if self._originals is not None: return self # If already started, ...
+        tracer = self
+        post, send, step = self._originals = (Event.post, Event.send, Frame._step)
+
+        def traced_post(event, args=None, delay=0):
+            tracer._record_event(event, 0, "post")
+            return post(event, args, delay)
+        def traced_send(event, args=None):
+            tracer._record_event(event, 1, "send")
+            return send(event, args)
+        def traced_step(frame, sender, msg):
+            stack = tracer._frame_stack()
+            stack.append(0.0) # Time spent in nested frames
+            t0 = time.perf_counter()
+            try:
+                return step(frame, sender, msg)
+            finally:
+                duration = time.perf_counter() - t0
+                nested_duration = stack.pop()
+                if stack: stack[-1] += duration
+                tracer._record_frame(frame, t0, duration, duration - nested_duration)
+
+        Event.post = traced_post
+        Event.send = traced_send
+        Frame._step = traced_step
+        return self
+
+    def stop(self):
+        if self._originals is None: return # If not started, ...
+        Event.post, Event.send, Frame._step = self._originals
+        self._originals = None
+
+    def reset(self):
+        self.counts.clear()
+        self.frame_times.clear()
+        self.trace_events.clear()
+        self._t0 = time.perf_counter()
+
+    def _frame_stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def _record_event(self, event, kind, category):
+        name = str(event.__name__)
+        self.counts[name][kind] += 1
+        self.trace_events.append({
+            'name': name, 'cat': category, 'ph': 'i', 's': 't',
+            'ts': 1e6 * (time.perf_counter() - self._t0), 'pid': os.getpid(), 'tid': threading.get_ident()
+        })
+
+    def _record_frame(self, frame, t0, duration, exclusive_duration):
+        name = str(frame.__name__)
+        frame_time = self.frame_times[name]
+        frame_time[0] += 1
+        frame_time[1] += exclusive_duration
+        frame_time[2] = max(frame_time[2], exclusive_duration)
+        self.trace_events.append({
+            'name': name, 'cat': 'frame', 'ph': 'X',
+            'ts': 1e6 * (t0 - self._t0), 'dur': 1e6 * duration, 'pid': os.getpid(), 'tid': threading.get_ident()
+        })
+
+    def report(self, top=20):
+        """
+        Return a human readable report of the busiest events and the slowest frames
+        """
+        lines = ["Events (posts / sends):"]
+        for name, (posts, sends) in sorted(self.counts.items(), key=lambda item: -sum(item[1]))[:top]:
+            lines.append("  {}: {} / {}".format(name, posts, sends))
+        lines.append("Frames (resumptions, total ms, max ms):")
+        for name, (resumptions, seconds, max_seconds) in sorted(self.frame_times.items(), key=lambda item: -item[1][1])[:top]:
+            lines.append("  {}: {}, {:.2f}, {:.2f}".format(name, resumptions, 1000.0 * seconds, 1000.0 * max_seconds))
+        return "\n".join(lines)
+
+    def dump_chrome_trace(self, filename):
+        """
+        Write the recorded trace in Chrome's trace event format
+        """
+        with open(filename, 'w') as file:
+            json.dump({'traceEvents': list(self.trace_events), 'displayTimeUnit': 'ms'}, file)
+
+class LeakDetector(object):
+    """
+    Counts live widgets, frames, events and signal connections per class to find objects that outlive their frames
+
+    Call `snapshot()` to record a baseline, exercise the application (e.g. open and close a dialog a few times) and call `report()` to list the counts
+    that grew since the snapshot. Disposed widgets are widgets that have been removed from their frame, but are still referenced (recycled widgets excluded).
+    Each count forces a full garbage collection, so don't call it from performance critical code.
+    """
+    def __init__(self):
+        self.baseline = None
+
+    @staticmethod
+    def count():
+        """
+        Return a dictionary of collections.Counter objects, counting live objects per class name
+        """
+        from . import Widget, _SignalEvent # Import lazily to avoid a circular import
+
+        gc.collect()
+        counts = {name: collections.Counter() for name in ('widgets', 'disposed_widgets', 'frames', 'events', 'connections')}
+        for obj in gc.get_objects():
+            if isinstance(obj, Widget):
+                counts['widgets'][obj.__class__.__name__] += 1
+                if obj._removed and obj not in type(obj).__dict__.get('_recycle_pool', ()):
+                    counts['disposed_widgets'][obj.__class__.__name__] += 1
+            elif isinstance(obj, Frame):
+                counts['frames'][obj.__class__.__name__] += 1
+            elif isinstance(obj, Event):
+                counts['events'][obj.__class__.__name__] += 1
+                sender = obj._sender() if isinstance(obj, _SignalEvent) else None
+                if sender is not None and not sender._removed: # Signals of disposed widgets are disconnected
+                    counts['connections'][sender.__class__.__name__] += 1
+        return counts
+
+    def snapshot(self):
+        self.baseline = self.count()
+        return self.baseline
+
+    def report(self, top=20):
+        """
+        Return a human readable report of live objects per class, including the growth since the last snapshot
+        """
+        counts = self.count()
+        lines = []
+        for category, counter in counts.items():
+            baseline = self.baseline[category] if self.baseline is not None else collections.Counter()
+            lines.append("{} ({}):".format(category.replace('_', ' ').capitalize(), sum(counter.values())))
+            for name, count in sorted(counter.items(), key=lambda item: (-(item[1] - baseline[item[0]]), -item[1]))[:top]:
+                growth = count - baseline[name]
+                lines.append("  {}: {}{}".format(name, count, " (+{})".format(growth) if growth > 0 else ""))
+        return "\n".join(lines)